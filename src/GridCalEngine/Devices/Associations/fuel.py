@@ -22,6 +22,13 @@ from GridCalEngine.Devices.Parents.editable_device import EditableDevice, Device
 
 class Fuel(EditableDevice):
 
+    # deterministic palette of dark colours (channels in 0-127, like rnd_color) to assign
+    # to the fuels that are created without colour, cycled with a class-level counter
+    _color_palette = ["#{:02x}{:02x}{:02x}".format(((i * 2654435761) >> 16) & 0x7F,
+                                                   ((i * 2654435761) >> 8) & 0x7F,
+                                                   (i * 2654435761) & 0x7F) for i in range(1, 257)]
+    _color_cursor = 0
+
     def __init__(self, name='',
                  code='',
                  idtag: Union[str, None] = None,
@@ -45,12 +52,22 @@ class Fuel(EditableDevice):
 
         self._cost_prof = Profile(default_value=cost, data_type=float)
 
-        self.color = color if color is not None else self.rnd_color()
+        self.color = color if color is not None else Fuel.next_palette_color()
 
         self.register(key='cost', units='e/t', tpe=float, definition='Cost of fuel (e / ton)',
                       profile_name='cost_prof')
         self.register(key='color', units='', tpe=str, definition='Color to paint')
 
+    @classmethod
+    def next_palette_color(cls) -> str:
+        """
+        Get the next colour of the fuels palette
+        :return: hex string
+        """
+        color = cls._color_palette[cls._color_cursor % len(cls._color_palette)]
+        cls._color_cursor += 1
+        return color
+
     @property
     def cost_prof(self) -> Profile:
         """
@@ -15,25 +15,244 @@
 # along with this program; if not, write to the Free Software Foundation,
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 from __future__ import annotations
-from typing import TYPE_CHECKING, List
+import multiprocessing
+import numpy as np
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import TYPE_CHECKING, List, Dict, Any, Union, Tuple
 
+from GridCalEngine.basic_structures import IntVec, Vec, Mat, StrVec
 from GridCalEngine.Devices import ContingencyGroup
+from GridCalEngine.Devices.Aggregation.contingency import Contingency
 from GridCalEngine.Devices.multi_circuit import MultiCircuit
-from GridCalEngine.DataStructures.numerical_circuit import compile_numerical_circuit_at
+from GridCalEngine.DataStructures.numerical_circuit import NumericalCircuit, compile_numerical_circuit_at
 from GridCalEngine.Simulations.ContingencyAnalysis.contingency_analysis_results import ContingencyAnalysisResults
-from GridCalEngine.Simulations.LinearFactors.linear_analysis import LinearAnalysis, LinearMultiContingencies
+from GridCalEngine.Simulations.ContingencyAnalysis.contingencies_report import (ContingencyResultsReport,
+                                                                                 get_monitored_base_values)
+from GridCalEngine.Simulations.LinearFactors.linear_analysis import (LinearAnalysis, LinearMultiContingencies,
+                                                                     LinearMultiContingency)
 from GridCalEngine.Simulations.ContingencyAnalysis.contingency_analysis_options import ContingencyAnalysisOptions
 
 if TYPE_CHECKING:
     from GridCalEngine.Simulations.ContingencyAnalysis.contingency_analysis_driver import ContingencyAnalysisDriver
 
 
+def linear_contingency_analysis_chunk(contingency_indices: IntVec,
+                                      numerical_circuit: NumericalCircuit,
+                                      multi_contingencies: List[LinearMultiContingency],
+                                      contingency_groups: List[ContingencyGroup],
+                                      contingencies: List[Contingency],
+                                      options: ContingencyAnalysisOptions,
+                                      PTDF: Mat,
+                                      mon_idx: IntVec,
+                                      flows_n: Vec,
+                                      loadings_n: Vec,
+                                      Pbus: Vec,
+                                      F: IntVec,
+                                      T: IntVec,
+                                      bus_area_indices: IntVec,
+                                      area_names: StrVec,
+                                      Sf: Mat,
+                                      Sbus: Mat,
+                                      loading: Mat,
+                                      report: ContingencyResultsReport,
+                                      srap_used_power: Mat,
+                                      t: Union[int, None] = None,
+                                      t_prob: float = 1.0,
+                                      calling_class: Union[ContingencyAnalysisDriver, None] = None) -> None:
+    """
+    Analyze a set of contingencies with the linear factors
+    :param contingency_indices: indices of the contingencies to analyze
+    :param numerical_circuit: NumericalCircuit
+    :param multi_contingencies: LinearMultiContingency of each contingency, the entry i belongs to contingency_indices[i]
+    :param contingency_groups: ContingencyGroup of each contingency, the entry i belongs to contingency_indices[i]
+    :param contingencies: list of all the Contingency devices (for the injection contingencies)
+    :param options: ContingencyAnalysisOptions
+    :param PTDF: PTDF matrix
+    :param mon_idx: indices of the monitored branches
+    :param flows_n: base flows (MW)
+    :param loadings_n: base loadings
+    :param Pbus: bus injections
+    :param F: branches "from" bus indices
+    :param T: branches "to" bus indices
+    :param bus_area_indices: area index of each bus
+    :param area_names: names of the areas
+    :param Sf: contingency flows (modified), the row i belongs to contingency_indices[i]
+    :param Sbus: contingency injections (modified), the row i belongs to contingency_indices[i]
+    :param loading: contingency loadings (modified), the row i belongs to contingency_indices[i]
+    :param report: ContingencyResultsReport (modified)
+    :param srap_used_power: (branch, nbus) matrix where the SRAP usage is accumulated (modified)
+    :param t: time index, if None the snapshot is used
+    :param t_prob: probability of te time
+    :param calling_class: ContingencyAnalysisDriver to report the progress (optional)
+    """
+    # the monitored branches values of the base case are the same for all the contingencies
+    base_values = get_monitored_base_values(mon_idx=mon_idx,
+                                            base_flow=flows_n,
+                                            rates=numerical_circuit.branch_data.rates,
+                                            contingency_rates=numerical_circuit.branch_data.contingency_rates,
+                                            srap_ratings=numerical_circuit.branch_data.protection_rates)
+
+    for i, ic in enumerate(contingency_indices):
+
+        multi_contingency = multi_contingencies[i]
+
+        if multi_contingency.has_injection_contingencies():
+            injections = numerical_circuit.set_linear_contingency_status(contingencies_list=contingencies)
+        else:
+            injections = None
+
+        c_flow = multi_contingency.get_contingency_flows(base_flow=flows_n, injections=injections)
+        c_loading = c_flow / (numerical_circuit.rates + 1e-9)
+
+        Sf[i, :] = c_flow  # already in MW
+        Sbus[i, :] = Pbus
+        loading[i, :] = c_loading
+        report.analyze(t=t,
+                       t_prob=t_prob,
+                       mon_idx=mon_idx,
+                       numerical_circuit=numerical_circuit,
+                       base_flow=flows_n,
+                       base_loading=loadings_n,
+                       contingency_flows=c_flow,
+                       contingency_loadings=c_loading,
+                       contingency_idx=ic,
+                       contingency_group=contingency_groups[i],
+                       using_srap=options.use_srap,
+                       srap_ratings=numerical_circuit.branch_data.protection_rates,
+                       srap_max_power=options.srap_max_power,
+                       srap_deadband=options.srap_deadband,
+                       contingency_deadband=options.contingency_deadband,
+                       srap_rever_to_nominal_rating=options.srap_rever_to_nominal_rating,
+                       multi_contingency=multi_contingency,
+                       PTDF=PTDF,
+                       available_power=numerical_circuit.bus_data.srap_availbale_power,
+                       srap_used_power=srap_used_power,
+                       F=F,
+                       T=T,
+                       bus_area_indices=bus_area_indices,
+                       area_names=area_names,
+                       top_n=options.srap_top_n,
+                       base_values=base_values)
+
+        # report progress
+        if t is None:
+            if calling_class is not None:
+                calling_class.report_text(f'Contingency group: {contingency_groups[i].name}')
+                calling_class.report_progress2(ic, len(multi_contingencies))
+
+
+def get_contingency_process_pool(n_processes: int) -> ProcessPoolExecutor:
+    """
+    Create the process pool used to analyze the contingencies in parallel.
+    The pool is meant to be created once per analysis run and shut down by its owner
+    :param n_processes: number of worker processes
+    :return: ProcessPoolExecutor
+    """
+    # spawn (and not fork) the workers, forking a process that runs numba threads is not safe
+    return ProcessPoolExecutor(max_workers=n_processes, mp_context=multiprocessing.get_context("spawn"))
+
+
+def can_run_in_parallel(options: ContingencyAnalysisOptions,
+                        linear_multiple_contingencies: LinearMultiContingencies) -> bool:
+    """
+    Check if the linear contingencies can be split among several processes.
+    The injection contingencies modify the numerical circuit cumulatively (each one sees the changes
+    of the previous ones), so they are only reproducible in series
+    :param options: ContingencyAnalysisOptions
+    :param linear_multiple_contingencies: LinearMultiContingencies
+    :return: true / false
+    """
+    if options.n_processes <= 1 or len(linear_multiple_contingencies.multi_contingencies) <= 1:
+        return False
+
+    for multi_contingency in linear_multiple_contingencies.multi_contingencies:
+        if multi_contingency.has_injection_contingencies():
+            return False
+
+    return True
+
+
+def _share_array(arr: np.ndarray, blocks: List[shared_memory.SharedMemory]) -> Tuple[str, Tuple[int, ...], str]:
+    """
+    Copy an array into a new shared memory block, so that the worker processes can read it without pickling it
+    :param arr: array to share
+    :param blocks: list of the shared memory blocks created (modified), the creator closes and unlinks them
+    :return: handle to attach the array (block name, shape, dtype)
+    """
+    arr = np.ascontiguousarray(arr)
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    blocks.append(shm)
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return shm.name, arr.shape, arr.dtype.str
+
+
+def _attach_array(handle: Tuple[str, Tuple[int, ...], str],
+                  blocks: List[shared_memory.SharedMemory]) -> np.ndarray:
+    """
+    Get the array of a shared memory block created by _share_array
+    :param handle: block name, shape, dtype
+    :param blocks: list of the shared memory blocks attached (modified), to close them once the arrays are released
+    :return: array backed by the shared memory (do not write it)
+    """
+    name, shape, dtype = handle
+    shm = shared_memory.SharedMemory(name=name)
+    blocks.append(shm)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _run_contingency_worker(context: Dict[str, Any],
+                            shared: Dict[str, Tuple[str, Tuple[int, ...], str]],
+                            contingency_indices: IntVec,
+                            multi_contingencies: List[LinearMultiContingency],
+                            contingency_groups: List[ContingencyGroup]):
+    """
+    Analyze a chunk of contingencies in a worker process
+    :param context: dictionary with the small linear_contingency_analysis_chunk arguments common to all the chunks
+    :param shared: handles of the large arrays common to all the chunks (argument name -> shared memory handle)
+    :param contingency_indices: indices of the contingencies to analyze
+    :param multi_contingencies: LinearMultiContingency of each contingency of the chunk
+    :param contingency_groups: ContingencyGroup of each contingency of the chunk
+    :return: Sf, Sbus, loading, report and srap_used_power of the chunk
+    """
+    nc: NumericalCircuit = context["numerical_circuit"]
+    n = len(contingency_indices)
+    Sf = np.zeros((n, nc.nbr), dtype=complex)
+    Sbus = np.zeros((n, nc.nbus), dtype=complex)
+    loading = np.zeros((n, nc.nbr), dtype=complex)
+    report = ContingencyResultsReport()
+    srap_used_power = np.zeros((nc.nbr, nc.nbus))
+
+    blocks: List[shared_memory.SharedMemory] = list()
+    arrays = {key: _attach_array(handle, blocks) for key, handle in shared.items()}
+
+    try:
+        linear_contingency_analysis_chunk(contingency_indices=contingency_indices,
+                                          multi_contingencies=multi_contingencies,
+                                          contingency_groups=contingency_groups,
+                                          Sf=Sf,
+                                          Sbus=Sbus,
+                                          loading=loading,
+                                          report=report,
+                                          srap_used_power=srap_used_power,
+                                          **arrays,
+                                          **context)
+    finally:
+        # the views must be released before closing the blocks
+        arrays.clear()
+        for shm in blocks:
+            shm.close()
+
+    return Sf, Sbus, loading, report, srap_used_power
+
+
 def linear_contingency_analysis(grid: MultiCircuit,
                                 options: ContingencyAnalysisOptions,
                                 linear_multiple_contingencies: LinearMultiContingencies,
                                 calling_class: ContingencyAnalysisDriver,
                                 t=None,
-                                t_prob=1.0) -> ContingencyAnalysisResults:
+                                t_prob=1.0,
+                                executor: Union[ProcessPoolExecutor, None] = None) -> ContingencyAnalysisResults:
     """
     Run N-1 simulation in series with HELM, non-linear solution
     :param grid: MultiCircuit
@@ -42,6 +261,8 @@ def linear_contingency_analysis(grid: MultiCircuit,
     :param calling_class: ContingencyAnalysisDriver
     :param t: time index, if None the snapshot is used
     :param t_prob: probability of te time
+    :param executor: process pool to use when options.n_processes > 1 (optional), if not provided
+                     a pool is created for this call only. Get it with get_contingency_process_pool
     :return: returns the results
     """
 
@@ -94,52 +315,93 @@ def linear_contingency_analysis(grid: MultiCircuit,
     if calling_class is not None:
         calling_class.report_text('Computing loading...')
 
-    # for each contingency group
-    for ic, multi_contingency in enumerate(linear_multiple_contingencies.multi_contingencies):
+    if can_run_in_parallel(options=options, linear_multiple_contingencies=linear_multiple_contingencies):
 
-        if multi_contingency.has_injection_contingencies():
-            cnt = grid.contingencies
-            injections = numerical_circuit.set_linear_contingency_status(contingencies_list=cnt)
-        else:
-            injections = None
+        # split the contingencies in consecutive chunks and analyze them in parallel processes.
+        # Every chunk carries its own contingencies and the small data common to all of them (numerical circuit,
+        # options, indices); the large dense arrays are put once in shared memory and only their handles are sent.
+        # Since the plan has no injection contingencies, the devices' contingencies are not needed
+        chunks = [c for c in np.array_split(np.arange(len(linear_multiple_contingencies.multi_contingencies)),
+                                            options.n_processes) if len(c)]
 
-        c_flow = multi_contingency.get_contingency_flows(base_flow=flows_n, injections=injections)
-        c_loading = c_flow / (numerical_circuit.rates + 1e-9)
+        context = dict(numerical_circuit=numerical_circuit,
+                       contingencies=list(),
+                       options=options,
+                       mon_idx=mon_idx,
+                       Pbus=Pbus,
+                       F=F,
+                       T=T,
+                       bus_area_indices=bus_area_indices,
+                       area_names=area_names,
+                       t=t,
+                       t_prob=t_prob)
 
-        results.Sf[ic, :] = c_flow  # already in MW
-        results.Sbus[ic, :] = Pbus
-        results.loading[ic, :] = c_loading
-        results.report.analyze(t=t,
-                               t_prob=t_prob,
-                               mon_idx=mon_idx,
-                               numerical_circuit=numerical_circuit,
-                               base_flow=flows_n,
-                               base_loading=loadings_n,
-                               contingency_flows=c_flow,
-                               contingency_loadings=c_loading,
-                               contingency_idx=ic,
-                               contingency_group=linear_multiple_contingencies.contingency_groups_used[ic],
-                               using_srap=options.use_srap,
-                               srap_ratings=numerical_circuit.branch_data.protection_rates,
-                               srap_max_power=options.srap_max_power,
-                               srap_deadband=options.srap_deadband,
-                               contingency_deadband=options.contingency_deadband,
-                               srap_rever_to_nominal_rating=options.srap_rever_to_nominal_rating,
-                               multi_contingency=multi_contingency,
-                               PTDF=linear_analysis.PTDF,
-                               available_power=numerical_circuit.bus_data.srap_availbale_power,
-                               srap_used_power=results.srap_used_power,
-                               F=F,
-                               T=T,
-                               bus_area_indices=bus_area_indices,
-                               area_names=area_names,
-                               top_n=options.srap_top_n)
+        own_executor = executor is None
+        if own_executor:
+            executor = get_contingency_process_pool(n_processes=len(chunks))
 
-        # report progress
-        if t is None:
-            if calling_class is not None:
-                calling_class.report_text(f'Contingency group: {linear_multiple_contingencies.contingency_groups_used[ic].name}')
-                calling_class.report_progress2(ic, len(linear_multiple_contingencies.multi_contingencies))
+        blocks: List[shared_memory.SharedMemory] = list()
+        futures = list()
+        try:
+            shared = dict(PTDF=_share_array(linear_analysis.PTDF, blocks),
+                          flows_n=_share_array(flows_n, blocks),
+                          loadings_n=_share_array(loadings_n, blocks))
+
+            futures = [executor.submit(_run_contingency_worker, context, shared, chunk,
+                                       [linear_multiple_contingencies.multi_contingencies[ic] for ic in chunk],
+                                       [linear_multiple_contingencies.contingency_groups_used[ic] for ic in chunk])
+                       for chunk in chunks]
+
+            # merge in the submission order, so that the report rows are in the serial order
+            for i, (chunk, future) in enumerate(zip(chunks, futures)):
+                Sf, Sbus, loading, report, srap_used_power = future.result()
+                results.Sf[chunk, :] = Sf
+                results.Sbus[chunk, :] = Sbus
+                results.loading[chunk, :] = loading
+                results.srap_used_power += srap_used_power
+                results.report.merge(report, release=True)
+
+                if t is None and calling_class is not None:
+                    calling_class.report_progress2(i + 1, len(chunks))
+        finally:
+            # no chunk may be using the shared arrays when they are released
+            for future in futures:
+                future.cancel()
+            wait(futures)
+
+            if own_executor:
+                executor.shutdown()
+
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+
+    else:
+        linear_contingency_analysis_chunk(
+            contingency_indices=np.arange(len(linear_multiple_contingencies.multi_contingencies)),
+            numerical_circuit=numerical_circuit,
+            multi_contingencies=linear_multiple_contingencies.multi_contingencies,
+            contingency_groups=linear_multiple_contingencies.contingency_groups_used,
+            contingencies=grid.contingencies,
+            options=options,
+            PTDF=linear_analysis.PTDF,
+            mon_idx=mon_idx,
+            flows_n=flows_n,
+            loadings_n=loadings_n,
+            Pbus=Pbus,
+            F=F,
+            T=T,
+            bus_area_indices=bus_area_indices,
+            area_names=area_names,
+            Sf=results.Sf,
+            Sbus=results.Sbus,
+            loading=results.loading,
+            report=results.report,
+            srap_used_power=results.srap_used_power,
+            t=t,
+            t_prob=t_prob,
+            calling_class=calling_class
+        )
 
     results.lodf = linear_analysis.LODF
 
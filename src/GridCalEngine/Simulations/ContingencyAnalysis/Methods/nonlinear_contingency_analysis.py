@@ -15,12 +15,14 @@
 # along with this program; if not, write to the Free Software Foundation,
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 from __future__ import annotations
-from typing import TYPE_CHECKING, Union
+from typing import TYPE_CHECKING, Union, Dict
 import numpy as np
 from GridCalEngine.Devices.multi_circuit import MultiCircuit
 from GridCalEngine.DataStructures.numerical_circuit import compile_numerical_circuit_at
 from GridCalEngine.Simulations.ContingencyAnalysis.contingency_analysis_results import ContingencyAnalysisResults
+from GridCalEngine.Simulations.ContingencyAnalysis.contingencies_report import get_monitored_base_values
 from GridCalEngine.Simulations.PowerFlow.power_flow_worker import multi_island_pf_nc
+from GridCalEngine.Simulations.PowerFlow.NumericalMethods.fast_decoupled import FastDecoupledFactorizations
 from GridCalEngine.Simulations.PowerFlow.power_flow_options import PowerFlowOptions, SolverType
 from GridCalEngine.Simulations.LinearFactors.linear_analysis import LinearAnalysis, LinearMultiContingencies
 from GridCalEngine.Simulations.ContingencyAnalysis.contingency_analysis_options import ContingencyAnalysisOptions
@@ -71,9 +73,14 @@ def nonlinear_contingency_analysis(grid: MultiCircuit,
     calc_branches = grid.get_branches_wo_hvdc()
     mon_idx = numerical_circuit.branch_data.get_monitor_enabled_indices()
 
+    # fast decoupled factorizations of each island, reused by the contingencies that do not change
+    # the B matrices (i.e. injection contingencies)
+    fdpf_factorizations: Dict[int, FastDecoupledFactorizations] = dict()
+
     # run 0
     pf_res_0 = multi_island_pf_nc(nc=numerical_circuit,
-                                  options=pf_opts)
+                                  options=pf_opts,
+                                  fdpf_factorizations=fdpf_factorizations)
 
     if options.use_srap:
 
@@ -96,6 +103,15 @@ def nonlinear_contingency_analysis(grid: MultiCircuit,
 
     available_power = numerical_circuit.generator_data.get_injections_per_bus().real
 
+    # the base case magnitudes are the same for all the contingencies
+    base_flow = np.abs(pf_res_0.Sf)
+    base_loading = np.abs(pf_res_0.loading)
+    base_values = get_monitored_base_values(mon_idx=mon_idx,
+                                            base_flow=base_flow,
+                                            rates=numerical_circuit.branch_data.rates,
+                                            contingency_rates=numerical_circuit.branch_data.contingency_rates,
+                                            srap_ratings=numerical_circuit.branch_data.protection_rates)
+
     # for each contingency group
     for ic, contingency_group in enumerate(linear_multiple_contingencies.contingency_groups_used):
 
@@ -113,7 +129,8 @@ def nonlinear_contingency_analysis(grid: MultiCircuit,
         # run
         pf_res = multi_island_pf_nc(nc=numerical_circuit,
                                     options=pf_opts,
-                                    V_guess=pf_res_0.voltage)
+                                    V_guess=pf_res_0.voltage,
+                                    fdpf_factorizations=fdpf_factorizations)
 
         results.Sf[ic, :] = pf_res.Sf
         results.Sbus[ic, :] = pf_res.Sbus
@@ -125,8 +142,8 @@ def nonlinear_contingency_analysis(grid: MultiCircuit,
                                t_prob=t_prob,
                                mon_idx=mon_idx,
                                numerical_circuit=numerical_circuit,
-                               base_flow=np.abs(pf_res_0.Sf),
-                               base_loading=np.abs(pf_res_0.loading),
+                               base_flow=base_flow,
+                               base_loading=base_loading,
                                contingency_flows=np.abs(pf_res.Sf),
                                contingency_loadings=np.abs(pf_res.loading),
                                contingency_idx=ic,
@@ -144,7 +161,8 @@ def nonlinear_contingency_analysis(grid: MultiCircuit,
                                T=T,
                                bus_area_indices=bus_area_indices,
                                area_names=area_names,
-                               top_n=options.srap_top_n)
+                               top_n=options.srap_top_n,
+                               base_values=base_values)
 
         # set the status
         numerical_circuit.set_contingency_status(contingencies, revert=True)
@@ -19,6 +19,7 @@ from typing import TYPE_CHECKING, Union
 from GridCalEngine.Devices.multi_circuit import MultiCircuit
 from GridCalEngine.DataStructures.numerical_circuit import compile_numerical_circuit_at
 from GridCalEngine.Simulations.ContingencyAnalysis.contingency_analysis_results import ContingencyAnalysisResults
+from GridCalEngine.Simulations.ContingencyAnalysis.contingencies_report import get_monitored_base_values
 from GridCalEngine.Simulations.LinearFactors.linear_analysis import LinearAnalysis, LinearMultiContingencies
 from GridCalEngine.Simulations.ContingencyAnalysis.contingency_analysis_options import ContingencyAnalysisOptions
 from GridCalEngine.Simulations.OPF.linear_opf_ts import run_linear_opf_ts
@@ -123,6 +124,13 @@ def optimal_linear_contingency_analysis(grid: MultiCircuit,
                                  logger=logger,
                                  export_model_fname=None)
 
+    # the monitored branches values of the base case are the same for all the contingencies
+    base_values = get_monitored_base_values(mon_idx=mon_idx,
+                                            base_flow=flows_n,
+                                            rates=numerical_circuit.branch_data.rates,
+                                            contingency_rates=numerical_circuit.branch_data.contingency_rates,
+                                            srap_ratings=numerical_circuit.branch_data.protection_rates)
+
     # for each contingency group
     for ic, multi_contingency in enumerate(linear_multiple_contingencies.multi_contingencies):
 
@@ -161,7 +169,8 @@ def optimal_linear_contingency_analysis(grid: MultiCircuit,
                                T=T,
                                bus_area_indices=bus_area_indices,
                                area_names=area_names,
-                               top_n=options.srap_top_n)
+                               top_n=options.srap_top_n,
+                               base_values=base_values)
 
         # report progress
         if t is None:
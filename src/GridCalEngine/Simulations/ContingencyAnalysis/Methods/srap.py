@@ -17,7 +17,7 @@
 import numpy as np
 import numba as nb
 from typing import Tuple
-from GridCalEngine.basic_structures import Vec, IntVec, Mat
+from GridCalEngine.basic_structures import Vec, IntVec, BoolVec, Mat
 
 
 @nb.njit(cache=True)
@@ -201,7 +201,7 @@ class BusesForSrap:
                 srap_gen_used2 = srap_gen_used[positive_idx]
 
                 # sort greater to lower, more positive first
-                idx = np.argsort(-sensitivities2)
+                idx = np.argsort(-sensitivities2, kind='stable')
                 idx2 = idx[:top_n]
                 p_available3 = p_available2[idx2]
                 sensitivities3 = sensitivities2[idx2]
@@ -235,7 +235,7 @@ class BusesForSrap:
                 srap_gen_used2 = srap_gen_used[negative_idx]
 
                 # sort lower to greater, more negative first
-                idx = np.argsort(sensitivities2)
+                idx = np.argsort(sensitivities2, kind='stable')
                 idx2 = idx[:top_n]
                 p_available3 = p_available2[idx2]
                 sensitivities3 = sensitivities2[idx2]
@@ -257,3 +257,67 @@ class BusesForSrap:
                 max_srap_power = 0.0
 
         return solved, max_srap_power
+
+
+def is_solvable_batch(c_flows: Vec,
+                      ratings: Vec,
+                      sensitivities: Mat,
+                      srap_pmax_mw: float,
+                      available_power: Vec,
+                      srap_used_power: Mat,
+                      branch_indices: IntVec,
+                      top_n: int = 1000) -> Tuple[BoolVec, Vec]:
+    """
+    Vectorized version of BusesForSrap.is_solvable for several overloaded branches at once
+    :param c_flows: Contingency flows (MW) of the branches, with sign
+    :param ratings: Branch ratings (MVA)
+    :param sensitivities: (n branches, nbus) matrix of sensitivities, zero for the buses not usable for SRAP
+    :param srap_pmax_mw: SRAP limit in MW
+    :param available_power: Array of available power per bus
+    :param srap_used_power: Matrix including power used in SRAP (nbranch,nbus)
+    :param branch_indices: indices of the branches (rows of srap_used_power)
+    :param top_n: maximum number of nodes affecting the oveload
+    :return: array of solved flags, array of max srap power per branch
+    """
+    n = sensitivities.shape[0]
+
+    if n == 0:
+        return np.zeros(0, dtype=bool), np.zeros(0)
+
+    positive = c_flows > 0
+
+    # orient the sensitivities, so that the buses that relieve the overload are positive
+    oriented = np.where(positive[:, np.newaxis], sensitivities, -sensitivities)
+    valid = (oriented > 0) & (available_power > 0)[np.newaxis, :]
+
+    # sort from the most to the least effective bus, the non-valid ones go to the end
+    order = np.argsort(np.where(valid, -oriented, np.inf), axis=1, kind='stable')[:, :top_n]
+    n_sel = np.minimum(valid.sum(axis=1), order.shape[1])
+
+    sel_valid = np.take_along_axis(valid, order, axis=1)
+    p_available3 = np.where(sel_valid, available_power[order], 0.0)
+    sensitivities3 = np.where(sel_valid, np.take_along_axis(sensitivities, order, axis=1), 0.0)
+
+    # interpolate the srap limit, to get the maximum srap power (vector_sum_srap for every row)
+    p_cum = np.cumsum(p_available3, axis=1)
+    p_prev = np.zeros_like(p_cum)
+    p_prev[:, 1:] = p_cum[:, :-1]
+    p_srap = np.where(p_cum <= srap_pmax_mw,
+                      p_available3,
+                      np.where(p_prev <= srap_pmax_mw, srap_pmax_mw - p_prev, 0.0))
+    max_srap_power = (p_srap * sensitivities3).sum(axis=1)
+
+    # positive flows are solved if the srap power covers the overload,
+    # negative flows are solved if the (negative) srap power is lower than the overload
+    overload = np.where(positive, c_flows - ratings, c_flows + ratings)
+    has_buses = n_sel > 0
+    solved = has_buses & np.where(positive, max_srap_power >= overload, max_srap_power <= overload)
+    max_srap_power = np.where(has_buses, np.where(solved, overload, max_srap_power), 0.0)
+
+    # register the power used by the solved branches
+    for i in np.flatnonzero(solved):
+        k = n_sel[i]
+        p_used = vector_sum_used_power_srap(p_available3[i, :k], sensitivities3[i, :k], max_srap_power[i])
+        srap_used_power[branch_indices[i], order[i, :k]] += p_used
+
+    return solved, max_srap_power
@@ -14,68 +14,291 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program; if not, write to the Free Software Foundation,
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+import csv
 import numpy as np
 import numba as nb
 import pandas as pd
 from scipy.sparse import csc_matrix
-from typing import List, Union, Any
-from GridCalEngine.basic_structures import IntVec, StrMat, StrVec, Vec, Mat
+from typing import List, Dict, Tuple, Union, Any, TextIO
+from GridCalEngine.basic_structures import IntVec, StrMat, StrVec, Vec, CxVec, Mat
 from GridCalEngine.DataStructures.numerical_circuit import NumericalCircuit
 from GridCalEngine.Devices import ContingencyGroup
 from GridCalEngine.Simulations.LinearFactors.linear_analysis import LinearMultiContingency
-from GridCalEngine.Simulations.ContingencyAnalysis.Methods.srap import BusesForSrap
-from GridCalEngine.Utils.Sparse.csc_numba import get_sparse_array_numba
+from GridCalEngine.Simulations.ContingencyAnalysis.Methods.srap import is_solvable_batch
+
+# report messages of each overload status
+# 0: error, 1: acceptable, 2: SRAP applicable, 3: SRAP deadband, 4: not acceptable
+OV_STATUS_MSG = np.array(['Error',
+                          'Overload acceptable',
+                          'Overload not acceptable',
+                          'Overload not acceptable',
+                          'Overload not acceptable'], dtype=object)
+
+OV_STATUS_SRAP_MSG = np.array(['Error',
+                               'SRAP not needed',
+                               'SRAP applicable',
+                               'SRAP not applicable',
+                               'SRAP not applicable'], dtype=object)
+
+# maximum number of failed branches for which the MLODF is used as a dense matrix in the SRAP sensitivities
+MLODF_DENSE_MAX_BRANCHES = 8
+
+# compensated PTDF values below this magnitude are not considered for SRAP
+SRAP_SENSITIVITY_THRESHOLD = 1e-3
 
 
 @nb.njit(cache=True)
-def get_ptdf_comp_numba(data: Vec, indices: IntVec, indptr: IntVec, PTDF: Mat, m: int, bd_indices: IntVec):
+def get_ptdf_comp_numba(data: Vec, indices: IntVec, indptr: IntVec, PTDF_m: Vec, PTDF_bd: Mat, m: int):
     """
     This computes the compensatd PTDF for a single branch
     PTDFc = MLODF[m, βδ] x PTDF[βδ, :] + PTDF[m, :]
     :param data: MLODF[:, βδ].data
-    :param indices: MLODF[:, βδ].indices
+    :param indices: MLODF[:, βδ].indices (sorted within each column)
     :param indptr: MLODF[:, βδ].indptr
-    :param PTDF: Full PTDF matrix
+    :param PTDF_m: PTDF[m, :]
+    :param PTDF_bd: PTDF[βδ, :] as a contiguous matrix, where the row j belongs to the column j of the MLODF
     :param m: intex of the monitored branch
-    :param bd_indices: indices of the failed branches
     :return:
     """
-    # Perform the operation
-    result = PTDF[m, :]
+    # copy, otherwise the accumulation below would modify the PTDF
+    result = PTDF_m.copy()
+
+    for j in range(PTDF_bd.shape[0]):
+
+        # binary search of the row m in the column j
+        a = indptr[j]
+        b = indptr[j + 1]
+        i = a + np.searchsorted(indices[a:b], m)
 
-    for j, bd_index in enumerate(bd_indices):
-        for i in range(indptr[j], indptr[j + 1]):
-            row_index = indices[i]
-            if row_index == m:
-                result += data[i] * PTDF[bd_index, :]
+        # accumulate the entry (and the duplicates, if any)
+        while i < b and indices[i] == m:
+            result += data[i] * PTDF_bd[j, :]
+            i += 1
 
     return result
 
 
-def get_ptdf_comp(mon_br_idx: int, branch_indices: IntVec, mlodf_factors: csc_matrix, PTDF: Mat):
+@nb.njit(cache=True)
+def classify_overload_numba(cf: Union[float, complex],
+                            bf: Union[float, complex],
+                            cl: Union[float, complex],
+                            b_flow: float,
+                            rate_nx_pu: float,
+                            rate_srap_pu: float,
+                            contingency_deadband: float,
+                            srap_db: float) -> Tuple[int, float, float]:
+    """
+    Screen a single monitored branch after a contingency and classify its overload
+    :param cf: post-contingency flow
+    :param bf: base flow
+    :param cl: post-contingency loading
+    :param b_flow: base flow magnitude
+    :param rate_nx_pu: contingency rate (p.u. of the rate)
+    :param rate_srap_pu: SRAP rate (p.u. of the rate)
+    :param contingency_deadband: minimum relative flow increase to study a branch
+    :param srap_db: SRAP dead band (p.u.)
+    :return: overload status (-1: not studied, 0: error, 1: acceptable, 2: SRAP applicable,
+             3: SRAP deadband, 4: not acceptable), post-contingency flow and loading magnitudes
+    """
+    # cheap screening with the squared magnitudes (no square roots):
+    # it may be overloaded and its flow may have increased
+    if cl.real * cl.real + cl.imag * cl.imag < 1.0:
+        return -1, 0.0, 0.0
+    if cf.real * cf.real + cf.imag * cf.imag < b_flow * b_flow:
+        return -1, 0.0, 0.0
+
+    flow = abs(cf)
+    load = abs(cl)
+
+    # Only study if the flow is affected enough by contingency,
+    # if it produces an overload, and if the variation affects negatively to the flow
+    if cf != bf and flow / (b_flow + 1e-9) - 1 > contingency_deadband and load > 1 and flow > b_flow:
+
+        # Conditions to set behaviour
+        if load <= rate_nx_pu:
+            return 1, flow, load
+        elif rate_nx_pu < load <= rate_srap_pu:
+            return 2, flow, load
+        elif rate_srap_pu < load <= rate_srap_pu + srap_db:
+            return 3, flow, load
+        elif load > rate_srap_pu + srap_db:
+            return 4, flow, load
+        else:
+            return 0, flow, load
+
+    return -1, 0.0, 0.0
+
+
+@nb.njit(cache=True)
+def classify_overload_row_numba(i: int,
+                                mon_c_flows: Union[Vec, CxVec],
+                                mon_base_flows: Union[Vec, CxVec],
+                                mon_c_loadings: Union[Vec, CxVec],
+                                b_flows: Vec,
+                                rates_nx_pu: Vec,
+                                rates_srap_pu: Vec,
+                                contingency_deadband: float,
+                                srap_db: float,
+                                status: IntVec,
+                                flow: Vec,
+                                load: Vec) -> None:
+    """
+    Classify the overload of the monitored branch i and store the result at the position i of the outputs
+    :param i: position of the branch in the monitored arrays
+    :param mon_c_flows: post-contingency flows of the monitored branches
+    :param mon_base_flows: base flows of the monitored branches
+    :param mon_c_loadings: post-contingency loadings of the monitored branches
+    :param b_flows: base flow magnitudes of the monitored branches
+    :param rates_nx_pu: contingency rates of the monitored branches (p.u. of the rates)
+    :param rates_srap_pu: SRAP rates of the monitored branches (p.u. of the rates)
+    :param contingency_deadband: minimum relative flow increase to study a branch
+    :param srap_db: SRAP dead band (p.u.)
+    :param status: overload status array (modified)
+    :param flow: post-contingency flow magnitudes array (modified)
+    :param load: post-contingency loading magnitudes array (modified)
+    """
+    status[i], flow[i], load[i] = classify_overload_numba(mon_c_flows[i], mon_base_flows[i],
+                                                          mon_c_loadings[i], b_flows[i],
+                                                          rates_nx_pu[i], rates_srap_pu[i],
+                                                          contingency_deadband, srap_db)
+
+
+@nb.njit(cache=True, parallel=True)
+def get_overload_status_numba(mon_c_flows: Union[Vec, CxVec],
+                              mon_base_flows: Union[Vec, CxVec],
+                              mon_c_loadings: Union[Vec, CxVec],
+                              b_flows: Vec,
+                              rates_nx_pu: Vec,
+                              rates_srap_pu: Vec,
+                              contingency_deadband: float,
+                              srap_deadband: float) -> Tuple[IntVec, Vec, Vec, IntVec]:
+    """
+    Screen the monitored branches after a contingency and classify their overloads
+    :param mon_c_flows: post-contingency flows of the monitored branches
+    :param mon_base_flows: base flows of the monitored branches
+    :param mon_c_loadings: post-contingency loadings of the monitored branches
+    :param b_flows: base flow magnitudes of the monitored branches
+    :param rates_nx_pu: contingency rates of the monitored branches (p.u. of the rates)
+    :param rates_srap_pu: SRAP rates of the monitored branches (p.u. of the rates)
+    :param contingency_deadband: minimum relative flow increase to study a branch
+    :param srap_deadband: SRAP dead band (in %)
+    :return: positions (in the monitored array) of the studied branches,
+             post-contingency flow magnitudes, post-contingency loading magnitudes,
+             overload status (0: error, 1: acceptable, 2: SRAP applicable, 3: SRAP deadband, 4: not acceptable)
+    """
+    n = len(mon_c_flows)
+    status = np.empty(n, dtype=np.int64)
+    flow = np.empty(n, dtype=np.float64)
+    load = np.empty(n, dtype=np.float64)
+    srap_db = srap_deadband / 100
+
+    if n < 1000:
+        for i in range(n):
+            classify_overload_row_numba(i, mon_c_flows, mon_base_flows, mon_c_loadings, b_flows, rates_nx_pu,
+                                        rates_srap_pu, contingency_deadband, srap_db, status, flow, load)
+    else:
+        # parallel version, the monitored branches are independent
+        for i in nb.prange(n):
+            classify_overload_row_numba(i, mon_c_flows, mon_base_flows, mon_c_loadings, b_flows, rates_nx_pu,
+                                        rates_srap_pu, contingency_deadband, srap_db, status, flow, load)
+
+    # compact the studied branches
+    study_idx = np.empty(n, dtype=np.int64)
+    k = 0
+    for i in range(n):
+        if status[i] >= 0:
+            study_idx[k] = i
+            k += 1
+    study_idx = study_idx[:k]
+
+    return study_idx, flow[study_idx], load[study_idx], status[study_idx]
+
+
+@nb.njit(cache=True)
+def get_srap_sensitivities_numba(PTDF: Mat, mon_idx: IntVec, mlodf_rows: Mat, PTDF_bd: Mat, threshold: float) -> Mat:
+    """
+    Compute the compensated PTDF of several monitored branches, dropping the small values in the same pass
+    PTDFc = MLODF[m, βδ] x PTDF[βδ, :] + PTDF[m, :]
+    :param PTDF: Full PTDF matrix
+    :param mon_idx: indices of the monitored branches
+    :param mlodf_rows: MLODF[mon_idx, βδ] as a dense matrix
+    :param PTDF_bd: PTDF[βδ, :] as a contiguous matrix
+    :param threshold: values with a magnitude equal or below this are set to zero
+    :return: thresholded PTDFc (monitored branches, buses)
+    """
+    n = len(mon_idx)
+    k, nbus = PTDF_bd.shape
+    res = np.empty((n, nbus))
+
+    for i in range(n):
+        m = mon_idx[i]
+        for b in range(nbus):
+            val = 0.0
+            for j in range(k):
+                val += mlodf_rows[i, j] * PTDF_bd[j, b]
+            val += PTDF[m, b]
+            res[i, b] = val if abs(val) > threshold else 0.0
+
+    return res
+
+
+def get_ptdf_comp(mon_br_idx: int, branch_indices: IntVec, mlodf_factors: csc_matrix, PTDF: Mat,
+                  PTDF_bd: Union[Mat, None] = None):
     """
     Get the compensated PTDF values for a single monitored branch
     :param mon_br_idx:
     :param branch_indices:
     :param mlodf_factors:
     :param PTDF:
+    :param PTDF_bd: PTDF[branch_indices, :] as a contiguous matrix, pass it to reuse it across monitored branches
     :return:
     """
     # PTDFc = MLODF[m, βδ] x PTDF[βδ, :] + PTDF[m, :]
     # PTDFc = mlodf_factors[mon_br_idx, :] @ PTDF[branch_indices, :] + PTDF[mon_br_idx, :]
 
+    # the row lookup is a binary search over each column
+    if not mlodf_factors.has_sorted_indices:
+        mlodf_factors.sort_indices()
+
+    # gather the rows of the failed branches once, so that the accumulations are sequential
+    if PTDF_bd is None:
+        PTDF_bd = np.ascontiguousarray(PTDF[branch_indices, :])
+
     res = get_ptdf_comp_numba(data=mlodf_factors.data,
                               indices=mlodf_factors.indices,
                               indptr=mlodf_factors.indptr,
-                              PTDF=PTDF,
-                              m=mon_br_idx,
-                              bd_indices=branch_indices)
+                              PTDF_m=PTDF[mon_br_idx, :],
+                              PTDF_bd=PTDF_bd,
+                              m=mon_br_idx)
 
     # ok = np.allclose(res, PTDFc[0, :], atol=1e-6)
 
     return res
 
 
+def get_monitored_base_values(mon_idx: IntVec,
+                              base_flow: Vec,
+                              rates: Vec,
+                              contingency_rates: Vec,
+                              srap_ratings: Vec) -> Tuple[Vec, Vec, Vec, Vec]:
+    """
+    Get the base flow magnitudes and the rating values of the monitored branches.
+    These are the same for every contingency of a base case, so the contingency methods
+    compute them once and pass them to ContingencyResultsReport.analyze
+    :param mon_idx: array of monitored branch indices
+    :param base_flow: base flows array
+    :param rates: branch rates
+    :param contingency_rates: branch contingency rates
+    :param srap_ratings: branch SRAP ratings
+    :return: base flow magnitudes, rates (+1e-9), contingency rates (p.u.), SRAP rates (p.u.)
+    """
+    b_flows = np.abs(base_flow[mon_idx])
+    mon_rates = rates[mon_idx] + 1e-9
+    rates_nx_pu = contingency_rates[mon_idx] / mon_rates
+    rates_srap_pu = srap_ratings[mon_idx] / mon_rates
+    return b_flows, mon_rates, rates_nx_pu, rates_srap_pu
+
+
 class ContingencyTableEntry:
     """
     Entry of a contingency report
@@ -102,6 +325,30 @@ class ContingencyTableEntry:
                "SRAP Power (MW)",
                "Solved with SRAP"]
 
+    # constructor arguments, in the order in which they are stored
+    __fields__ = ("time_index",
+                  "t_prob",
+                  "area_from",
+                  "area_to",
+                  "base_name",
+                  "contingency_name",
+                  "base_rating",
+                  "contingency_rating",
+                  "srap_rating",
+                  "base_flow",
+                  "post_contingency_flow",
+                  "post_srap_flow",
+                  "base_loading",
+                  "post_contingency_loading",
+                  "post_srap_loading",
+                  "msg_ov",
+                  "msg_srap",
+                  "srap_power",
+                  "solved_by_srap")
+
+    # no per-instance __dict__, there may be millions of entries
+    __slots__ = __fields__
+
     def __init__(self,
                  time_index: int,
                  t_prob: float,
@@ -206,7 +453,7 @@ class ContingencyTableEntry:
         Get list of string values
         :return: List[str]
         """
-        return [str(a) for a in self.to_list(time_array=time_array, time_format=time_format)]
+        return list(map("{}".format, self.to_list(time_array=time_array, time_format=time_format)))
 
     def to_array(self, time_array: Union[pd.DatetimeIndex, None], time_format='%Y/%m/%d  %H:%M.%S') -> StrVec:
         """
@@ -225,14 +472,58 @@ class ContingencyResultsReport:
         """
         Constructor
         """
-        self.entries: List[ContingencyTableEntry] = list()
+        # the report is stored by columns (one list per ContingencyTableEntry field)
+        # to avoid creating one python object per reported row
+        self._cols: Dict[str, List[Any]] = {f: list() for f in ContingencyTableEntry.__fields__}
+
+        # rows added since the last consolidation, as tuples in the __fields__ order.
+        # Appending a tuple is the cheapest way of adding a row; they are moved into
+        # the columns the next time the columns are read (see _consolidate)
+        self._pending_rows: List[Tuple[Any, ...]] = list()
+
+        # streaming to disk (see open_stream)
+        self._stream_fmt: Union[None, str] = None
+        self._stream_file: Union[None, TextIO] = None
+        self._stream_writer: Any = None
+        self._stream_batch_size: int = 65536
+        self._stream_time_array: Union[pd.DatetimeIndex, None] = None
+        self._stream_time_format: str = '%Y/%m/%d  %H:%M.%S'
+        self._n_streamed: int = 0
+
+    @property
+    def entries(self) -> List[ContingencyTableEntry]:
+        """
+        Get the report rows as ContingencyTableEntry objects
+        :return: List[ContingencyTableEntry]
+        """
+        self._consolidate()
+        return [ContingencyTableEntry(*row) for row in zip(*self._cols.values())]
+
+    def _consolidate(self):
+        """
+        Move the pending rows into the columns
+        """
+        if len(self._pending_rows):
+            for col, values in zip(self._cols.values(), zip(*self._pending_rows)):
+                col.extend(values)
+            self._pending_rows.clear()
+
+    def _add_row(self, row: Tuple[Any, ...]):
+        """
+        Add a row, given as a tuple of values in the ContingencyTableEntry.__fields__ order
+        :param row: tuple of values
+        """
+        self._pending_rows.append(row)
+
+        if self._stream_writer is not None and self.size() >= self._stream_batch_size:
+            self.flush_stream()
 
     def add_entry(self, entry: ContingencyTableEntry):
         """
         Add contingencies entry
         :param entry: ContingencyTableEntry
         """
-        self.entries.append(entry)
+        self._add_row(tuple(getattr(entry, f) for f in ContingencyTableEntry.__fields__))
 
     def add(self,
             time_index: int,
@@ -278,41 +569,79 @@ class ContingencyResultsReport:
         :param solved_by_srap:
         :return:
         """
-        self.add_entry(ContingencyTableEntry(
-            time_index=time_index,
-            t_prob=t_prob,
-            area_from=area_from,
-            area_to=area_to,
-            base_name=base_name,
-            contingency_name=contingency_name,
-            base_rating=base_rating,
-            contingency_rating=contingency_rating,
-            srap_rating=srap_rating,
-            base_flow=base_flow,
-            post_contingency_flow=post_contingency_flow,
-            post_srap_flow=post_srap_flow,
-            base_loading=base_loading,
-            post_contingency_loading=post_contingency_loading,
-            post_srap_loading=post_srap_loading,
-            msg_ov=msg_ov,
-            msg_srap=msg_srap,
-            srap_power=srap_power,
-            solved_by_srap=solved_by_srap)
-        )
+        self._add_row((time_index,
+                       t_prob,
+                       area_from,
+                       area_to,
+                       base_name,
+                       contingency_name,
+                       base_rating,
+                       contingency_rating,
+                       srap_rating,
+                       base_flow,
+                       post_contingency_flow,
+                       post_srap_flow,
+                       base_loading,
+                       post_contingency_loading,
+                       post_srap_loading,
+                       msg_ov,
+                       msg_srap,
+                       srap_power,
+                       solved_by_srap))
+
+    def add_batch(self, **columns):
+        """
+        Add several rows at once, given by columns
+        :param columns: one value per ContingencyTableEntry.__fields__ name, either an array (or list)
+                        with one value per row, or a scalar common to all the rows
+        """
+        missing = [f for f in ContingencyTableEntry.__fields__ if f not in columns]
+        if len(missing):
+            raise Exception("Missing report columns: {}".format(missing))
+
+        lengths = {len(v) for v in columns.values() if isinstance(v, (np.ndarray, list, tuple))}
+        if len(lengths) != 1:
+            raise Exception("The report columns must have one common length, got {}".format(lengths))
+        n = lengths.pop()
+
+        self._consolidate()  # keep the rows order
+
+        for f, col in self._cols.items():
+            values = columns[f]
+            if isinstance(values, np.ndarray):
+                col.extend(values.tolist())
+            elif isinstance(values, (list, tuple)):
+                col.extend(values)
+            else:
+                col.extend([values] * n)
+
+        if self._stream_writer is not None and self.size() >= self._stream_batch_size:
+            self.flush_stream()
 
-    def merge(self, other: "ContingencyResultsReport"):
+    def merge(self, other: "ContingencyResultsReport", release: bool = True):
         """
         Add another ContingencyResultsReport in-place
         :param other: ContingencyResultsReport instance
+        :param release: empty the other report afterwards, so that its rows are not kept twice in memory
         """
-        self.entries += other.entries
+        self._consolidate()
+        other._consolidate()
+
+        for f, col in self._cols.items():
+            other_col = other._cols[f]
+            col.extend(other_col)
+            if release:
+                other_col.clear()
+
+        if self._stream_writer is not None and self.size() >= self._stream_batch_size:
+            self.flush_stream()
 
     def size(self) -> int:
         """
         Get the size
         :return: number of entries
         """
-        return len(self.entries)
+        return len(self._cols["time_index"]) + len(self._pending_rows)
 
     def n_cols(self) -> int:
         """
@@ -336,24 +665,153 @@ class ContingencyResultsReport:
         """
         return np.arange(0, self.size())
 
+    def get_columns(self, time_array: Union[pd.DatetimeIndex, None] = None,
+                    time_format='%Y/%m/%d  %H:%M.%S') -> List[Union[List[Any], np.ndarray]]:
+        """
+        Get the report columns in the order of the headers
+        :param time_array: optional time array to get the time
+        :param time_format: optional time format to display the time
+        :return: list of columns
+        """
+        self._consolidate()
+        n = self.size()
+
+        time_idx = self._cols["time_index"]
+        if time_array is not None and n > 0:
+            # format each distinct time step once and broadcast it to the rows
+            t_unique, t_inv = np.unique(time_idx, return_inverse=True)
+            t_str = time_array[t_unique].strftime(time_format).values.astype(str)[t_inv]
+        else:
+            t_str = [""] * n
+
+        # same column order as ContingencyTableEntry.to_list
+        return [time_idx, t_str] + [self._cols[f] for f in ContingencyTableEntry.__fields__[1:]]
+
+    def open_stream(self,
+                    file_name: str,
+                    fmt: str = 'csv',
+                    time_array: Union[pd.DatetimeIndex, None] = None,
+                    time_format: str = '%Y/%m/%d  %H:%M.%S',
+                    batch_size: int = 65536):
+        """
+        Write the report to disk while it is being generated instead of keeping all of it in memory.
+        The rows are buffered and written in batches of batch_size rows; the buffered rows are the only
+        ones kept by the report, so remember to call close_stream to write the last batch
+        :param file_name: name of the file to write
+        :param fmt: 'csv' or 'arrow' (arrow IPC file)
+        :param time_array: optional time array to write the time
+        :param time_format: optional time format to write the time
+        :param batch_size: number of rows to buffer before writing them
+        """
+        if self._stream_writer is not None:
+            self.close_stream()
+
+        if fmt == 'csv':
+            self._stream_file = open(file_name, 'w', newline='')
+            self._stream_writer = csv.writer(self._stream_file)
+            self._stream_writer.writerow(self.get_headers())
+
+        elif fmt == 'arrow':
+            import pyarrow as pa
+            self._stream_writer = pa.ipc.new_file(file_name, self.get_arrow_schema())
+
+        else:
+            raise Exception(f"Unsupported report stream format {fmt}")
+
+        self._stream_fmt = fmt
+        self._stream_batch_size = batch_size
+        self._stream_time_array = time_array
+        self._stream_time_format = time_format
+        self._n_streamed = 0
+
+    @staticmethod
+    def get_arrow_schema():
+        """
+        Get the pyarrow schema of the report columns
+        :return: pyarrow.Schema
+        """
+        import pyarrow as pa
+        types = [pa.int64(), pa.string(), pa.float64()] + [pa.string()] * 4 + [pa.float64()] * 9 + \
+                [pa.string(), pa.string(), pa.float64(), pa.bool_()]
+        return pa.schema([(hdr, tpe) for hdr, tpe in zip(ContingencyTableEntry.__hdr__, types)])
+
+    def flush_stream(self):
+        """
+        Write the buffered rows to the stream and release them
+        """
+        if self._stream_writer is None or self.size() == 0:
+            return
+
+        columns = self.get_columns(time_array=self._stream_time_array, time_format=self._stream_time_format)
+
+        if self._stream_fmt == 'csv':
+            self._stream_writer.writerows(zip(*columns))
+
+        elif self._stream_fmt == 'arrow':
+            import pyarrow as pa
+            schema = self.get_arrow_schema()
+            self._stream_writer.write_batch(
+                pa.record_batch([pa.array(col, type=fld.type) for col, fld in zip(columns, schema)], schema=schema)
+            )
+
+        self._n_streamed += self.size()
+
+        for col in self._cols.values():
+            col.clear()
+
+    def close_stream(self):
+        """
+        Write the remaining rows and close the stream
+        """
+        if self._stream_writer is None:
+            return
+
+        self.flush_stream()
+
+        if self._stream_fmt == 'arrow':
+            self._stream_writer.close()
+        else:
+            self._stream_file.close()
+
+        self._stream_fmt = None
+        self._stream_file = None
+        self._stream_writer = None
+        self._stream_time_array = None
+
+    def streamed_size(self) -> int:
+        """
+        Number of rows written to the stream so far
+        :return: int
+        """
+        return self._n_streamed
+
     def get_data(self, time_array: Union[pd.DatetimeIndex, None] = None, time_format='%Y/%m/%d  %H:%M.%S') -> StrMat:
         """
-        Get data as list of lists of strings
-        :return: List[List[str]]
+        Get data as a matrix of strings
+        :return: StrMat
         """
-        data = np.empty((self.size(), self.n_cols()), dtype=object)
-        for i, e in enumerate(self.entries):
-            data[i, :] = e.to_array(time_array=time_array, time_format=time_format)
+        n = self.size()
+        columns = self.get_columns(time_array=time_array, time_format=time_format)
+
+        # let numpy do the string conversion of each column
+        str_columns = [np.asarray(col).astype(str) for col in columns]
+
+        # packed unicode matrix wide enough for the longest column
+        width = max(col.dtype.itemsize // np.dtype('<U1').itemsize for col in str_columns)
+        data = np.empty((n, self.n_cols()), dtype=f'<U{width}')
+        for j, col in enumerate(str_columns):
+            data[:, j] = col
+
         return data
 
     def get_df(self, time_array: Union[pd.DatetimeIndex, None], time_format='%Y/%m/%d  %H:%M.%S') -> pd.DataFrame:
         """
-        Get data as pandas DataFrame
+        Get data as pandas DataFrame, built from the report columns so that pandas keeps their types
         :return: DataFrame
         """
-        return pd.DataFrame(data=self.get_data(time_array=time_array, time_format=time_format),
-                            index=self.get_index(),
-                            columns=self.get_headers())
+        columns = self.get_columns(time_array=time_array, time_format=time_format)
+        return pd.DataFrame(data={hdr: col for hdr, col in zip(self.get_headers(), columns)},
+                            index=pd.RangeIndex(self.size()))  # same values as get_index, not allocated
 
     def get_summary_table(self,
                           time_array: Union[pd.DatetimeIndex, None],
@@ -490,8 +948,7 @@ class ContingencyResultsReport:
         :param other: ContingencyResultsReport
         :return: self
         """
-        for entry in other.entries:
-            self.add_entry(entry)
+        self.merge(other, release=False)
         return self
 
     def analyze(self,
@@ -520,7 +977,8 @@ class ContingencyResultsReport:
                 bus_area_indices: Vec = None,
                 area_names: Vec = None,
                 top_n: int = 5,
-                detailed_massive_report: bool = True):
+                detailed_massive_report: bool = True,
+                base_values: Union[None, Tuple[Vec, Vec, Vec, Vec]] = None):
         """
         Analize contingency resuts and add them to the report
         :param t: time index
@@ -549,170 +1007,163 @@ class ContingencyResultsReport:
         :param area_names:
         :param top_n: maximum number of nodes affecting the oveload
         :param detailed_massive_report: Generate massive report
+        :param base_values: values of the monitored branches given by get_monitored_base_values for this base case,
+                            if None they are computed here
         """
 
+        # bind the arrays used row by row to locals, to avoid the attribute lookups in the loops
+        branch_names = numerical_circuit.branch_data.names
+        rates = numerical_circuit.branch_data.rates
+        contingency_rates = numerical_circuit.branch_data.contingency_rates
+        has_areas = len(area_names) > 0
+        add_row = self._add_row
+        t_val = t if t is not None else 0
+        cname = contingency_group.name
+
+        if base_values is None:
+            base_values = get_monitored_base_values(mon_idx=mon_idx,
+                                                    base_flow=base_flow,
+                                                    rates=rates,
+                                                    contingency_rates=contingency_rates,
+                                                    srap_ratings=srap_ratings)
+
+        b_flows, mon_rates, rates_nx_pu, rates_srap_pu = base_values
+
         # Reporting base case
         if contingency_idx == 0:  # only doing it once per hour
 
-            for m in mon_idx:
-                if len(area_names):
-                    area_from = area_names[bus_area_indices[F[m]]]
-                    area_to = area_names[bus_area_indices[T[m]]]
+            # only add if overloaded
+            base_ov_idx = mon_idx[b_flows > rates[mon_idx]]
+
+            if len(base_ov_idx):
+                if has_areas:
+                    area_names_arr = np.asarray(area_names)
+                    area_from = area_names_arr[bus_area_indices[F[base_ov_idx]]]
+                    area_to = area_names_arr[bus_area_indices[T[base_ov_idx]]]
                 else:
                     area_from = ""
                     area_to = ""
 
-                if abs(base_flow[m]) > numerical_circuit.rates[m]:  # only add if overloaded
-
-                    self.add(time_index=t if t is not None else 0,
-                             t_prob=t_prob,
-                             area_from=area_from,
-                             area_to=area_to,
-                             base_name=numerical_circuit.branch_data.names[m],
-                             contingency_name='Base',
-                             base_rating=numerical_circuit.branch_data.rates[m],
-                             contingency_rating=numerical_circuit.branch_data.contingency_rates[m],
-                             srap_rating=srap_ratings[m],
-                             base_flow=abs(base_flow[m]),
-                             post_contingency_flow=0.0,
-                             post_srap_flow=0.0,
-                             base_loading=abs(base_flow[m]) / (numerical_circuit.rates[m] + 1e-9),
-                             post_contingency_loading=0.0,
-                             post_srap_loading=0.0,
-                             msg_ov='Overload not acceptable',
-                             msg_srap='SRAP not applicable',
-                             srap_power=0.0,
-                             solved_by_srap=False)
-
-        # Now evalueting the effect of contingencies
-        for m in mon_idx:  # for each monitored branch ...
-
-            if len(area_names):
-                area_from = area_names[bus_area_indices[F[m]]]
-                area_to = area_names[bus_area_indices[T[m]]]
+                base_ov_flow = np.abs(base_flow[base_ov_idx])
+
+                self.add_batch(time_index=t_val,
+                               t_prob=t_prob,
+                               area_from=area_from,
+                               area_to=area_to,
+                               base_name=np.asarray(branch_names)[base_ov_idx],
+                               contingency_name='Base',
+                               base_rating=rates[base_ov_idx],
+                               contingency_rating=contingency_rates[base_ov_idx],
+                               srap_rating=srap_ratings[base_ov_idx],
+                               base_flow=base_ov_flow,
+                               post_contingency_flow=0.0,
+                               post_srap_flow=0.0,
+                               base_loading=base_ov_flow / (rates[base_ov_idx] + 1e-9),
+                               post_contingency_loading=0.0,
+                               post_srap_loading=0.0,
+                               msg_ov='Overload not acceptable',
+                               msg_srap='SRAP not applicable',
+                               srap_power=0.0,
+                               solved_by_srap=False)
+
+        # Now evaluating the effect of contingencies
+        study_idx, c_flow, c_load, ov_status = get_overload_status_numba(
+            mon_c_flows=contingency_flows[mon_idx],
+            mon_base_flows=base_flow[mon_idx],
+            mon_c_loadings=contingency_loadings[mon_idx],
+            b_flows=b_flows,
+            rates_nx_pu=rates_nx_pu,
+            rates_srap_pu=rates_srap_pu,
+            contingency_deadband=contingency_deadband,
+            srap_deadband=srap_deadband
+        )
+
+        msg_ov = OV_STATUS_MSG[ov_status]  # Overwritten if solved by SRAP
+        msg_srap = OV_STATUS_SRAP_MSG[ov_status]
+        cond_srap = (ov_status == 2) | (ov_status == 3)  # Srap aplicable
+        solved_by_srap = np.zeros(len(study_idx), dtype=bool)
+        post_srap_flow = c_flow.copy()  # Overwritten if srap activated
+        max_srap_power = np.where(ov_status == 0, -99999.999, 0.0)
+
+        if using_srap and cond_srap.any():
+
+            srap_idx = np.flatnonzero(cond_srap)
+            srap_mon_idx = mon_idx[study_idx[srap_idx]]
+
+            # compute the sensitivities for the monitored lines with all buses
+            # PTDFc = MLODF[m, βδ] x PTDF[βδ, :] + PTDF[m, :]
+            # the rows of the failed branches are gathered once into a contiguous buffer
+            PTDF_bd = np.ascontiguousarray(PTDF[multi_contingency.branch_indices, :])
+
+            # information about the buses that we can use for SRAP
+            if len(multi_contingency.branch_indices) <= MLODF_DENSE_MAX_BRANCHES:
+                # few failed branches: the dense MLODF (nbr x k) is cheap, and the compensation
+                # and the thresholding are done in a single pass
+                mlodf_dense = multi_contingency.mlodf_factors.toarray()
+                sensitivities = get_srap_sensitivities_numba(PTDF=PTDF,
+                                                             mon_idx=srap_mon_idx,
+                                                             mlodf_rows=mlodf_dense[srap_mon_idx, :],
+                                                             PTDF_bd=PTDF_bd,
+                                                             threshold=SRAP_SENSITIVITY_THRESHOLD)
             else:
-                area_from = ""
-                area_to = ""
-
-            c_flow = abs(contingency_flows[m])
-            b_flow = abs(base_flow[m])
-
-            c_load = abs(contingency_loadings[m])
-
-            rate_nx_pu = numerical_circuit.contingency_rates[m] / (numerical_circuit.rates[m] + 1e-9)
-            rate_srap_pu = srap_ratings[m] / (numerical_circuit.rates[m] + 1e-9)
-
-            # Affected by contingency?
-            affected_by_cont1 = contingency_flows[m] != base_flow[m]
-            affected_by_cont2 = c_flow / (b_flow + 1e-9) - 1 > contingency_deadband
-
-            # Only study if the flow is affected enough by contingency,
-            # if it produces an overload, and if the variation affects negatively to the flow
-            if affected_by_cont1 and affected_by_cont2 and c_load > 1 and c_flow > b_flow:
-
-                # Conditions to set behaviour
-                if 1 < c_load <= rate_nx_pu:
-                    ov_status = 1
-                    msg_ov = 'Overload acceptable'
-                    cond_srap = False
-                    msg_srap = 'SRAP not needed'
-                    solved_by_srap = False
-                    post_srap_flow = c_flow
-                    max_srap_power = 0.0
-
-                elif rate_nx_pu < c_load <= rate_srap_pu:
-                    ov_status = 2
-                    msg_ov = 'Overload not acceptable'  # Overwritten if solved
-                    cond_srap = True  # Srap aplicable
-                    msg_srap = 'SRAP applicable'
-                    solved_by_srap = False
-                    post_srap_flow = c_flow  # Overwritten if srap activated
-                    max_srap_power = 0.0
-
-                elif rate_srap_pu < c_load <= rate_srap_pu + srap_deadband / 100:
-                    ov_status = 3
-                    msg_ov = 'Overload not acceptable'
-                    cond_srap = True
-                    msg_srap = 'SRAP not applicable'
-                    solved_by_srap = False
-                    post_srap_flow = c_flow  # Overwritten if srap activated
-                    max_srap_power = 0.0
-
-                elif c_load > rate_srap_pu + srap_deadband / 100:
-                    ov_status = 4
-                    msg_ov = 'Overload not acceptable'
-                    cond_srap = False
-                    msg_srap = 'SRAP not applicable'
-                    solved_by_srap = False
-                    post_srap_flow = c_flow
-                    max_srap_power = 0.0
+                # the MLODF is converted to CSR once, so that its monitored rows are read directly
+                # and all the monitored lines are compensated with a single sparse-dense product
+                mlodf_csr = multi_contingency.mlodf_factors.tocsr()
+                sensitivities = PTDF[srap_mon_idx, :] + mlodf_csr[srap_mon_idx, :] @ PTDF_bd
+                sensitivities[np.abs(sensitivities) <= SRAP_SENSITIVITY_THRESHOLD] = 0.0
+
+            if srap_rever_to_nominal_rating:
+                rate_goal = rates[srap_mon_idx]
+            else:
+                rate_goal = contingency_rates[srap_mon_idx]
+
+            solved, srap_power = is_solvable_batch(
+                c_flows=contingency_flows[srap_mon_idx].real,  # the real part because it must have the sign
+                ratings=rate_goal,
+                sensitivities=sensitivities,
+                srap_pmax_mw=srap_max_power,
+                available_power=available_power,
+                srap_used_power=srap_used_power,
+                branch_indices=srap_mon_idx,
+                top_n=top_n
+            )
+
+            solved_by_srap[srap_idx] = solved
+            max_srap_power[srap_idx] = srap_power
+            post_srap_flow[srap_idx] = np.maximum(post_srap_flow[srap_idx] - np.abs(srap_power), 0.0)
+            msg_ov[srap_idx] = np.where(solved & (ov_status[srap_idx] == 2),
+                                        'Overload acceptable',
+                                        'Overload not acceptable')
+
+        if detailed_massive_report:
+            for i, k in enumerate(study_idx):  # for each monitored branch studied ...
+
+                m = mon_idx[k]
+
+                if has_areas:
+                    area_from = area_names[bus_area_indices[F[m]]]
+                    area_to = area_names[bus_area_indices[T[m]]]
                 else:
-                    msg_srap = 'Error'
-                    ov_status = 0
-                    cond_srap = False
-                    post_srap_flow = c_flow
-                    msg_ov = 'Error'
-                    max_srap_power = -99999.999
-                    solved_by_srap = False
-
-                if using_srap and cond_srap:
-
-                    # compute the sensitivities for the monitored line with all buses
-                    # PTDFc = MLODF[m, βδ] x PTDF[βδ, :] + PTDF[m, :]
-                    # PTDFc = multi_contingency.mlodf_factors[m, :] @ PTDF[multi_contingency.branch_indices, :] + PTDF[m, :]
-                    PTDFc = get_ptdf_comp(mon_br_idx=m,
-                                          branch_indices=multi_contingency.branch_indices,
-                                          mlodf_factors=multi_contingency.mlodf_factors,
-                                          PTDF=PTDF)
-
-                    # information about the buses that we can use for SRAP
-                    sensitivities, indices = get_sparse_array_numba(PTDFc, threshold=1e-3)
-                    buses_for_srap = BusesForSrap(branch_idx=m,
-                                                  bus_indices=indices,
-                                                  sensitivities=sensitivities)
-
-                    if srap_rever_to_nominal_rating:
-                        rate_goal = numerical_circuit.rates[m]
-
-                    else:
-                        rate_goal = numerical_circuit.contingency_rates[m]
-
-                    solved_by_srap, max_srap_power = buses_for_srap.is_solvable(
-                        c_flow=contingency_flows[m].real,  # the real part because it must have the sign
-                        rating=rate_goal,
-                        srap_pmax_mw=srap_max_power,
-                        available_power=available_power,
-                        branch_idx=m,
-                        top_n=top_n,
-                        srap_used_power=srap_used_power
-                    )
-
-                    post_srap_flow = abs(c_flow) - abs(max_srap_power)
-                    if post_srap_flow < 0:
-                        post_srap_flow = 0.0
-
-                    if solved_by_srap and ov_status == 2:
-                        msg_ov = 'Overload acceptable'
-                    else:
-                        msg_ov = 'Overload not acceptable'
-
-                if detailed_massive_report:
-                    self.add(time_index=t if t is not None else 0,
-                             t_prob=t_prob,
-                             area_from=area_from,
-                             area_to=area_to,
-                             base_name=numerical_circuit.branch_data.names[m],
-                             contingency_name=contingency_group.name,
-                             base_rating=numerical_circuit.branch_data.rates[m],
-                             contingency_rating=numerical_circuit.branch_data.contingency_rates[m],
-                             srap_rating=srap_ratings[m],
-                             base_flow=abs(b_flow),
-                             post_contingency_flow=abs(c_flow),
-                             post_srap_flow=post_srap_flow,
-                             base_loading=abs(base_loading[m]),
-                             post_contingency_loading=abs(contingency_loadings[m]),
-                             post_srap_loading=post_srap_flow / (numerical_circuit.rates[m] + 1e-9),
-                             msg_ov=msg_ov,
-                             msg_srap=msg_srap,
-                             srap_power=abs(max_srap_power),
-                             solved_by_srap=solved_by_srap)
+                    area_from = ""
+                    area_to = ""
+
+                # same order as ContingencyTableEntry.__fields__
+                add_row((t_val,
+                         t_prob,
+                         area_from,
+                         area_to,
+                         branch_names[m],
+                         cname,
+                         rates[m],
+                         contingency_rates[m],
+                         srap_ratings[m],
+                         b_flows[k],
+                         c_flow[i],
+                         post_srap_flow[i],
+                         abs(base_loading[m]),
+                         c_load[i],
+                         post_srap_flow[i] / mon_rates[k],
+                         msg_ov[i],
+                         msg_srap[i],
+                         abs(max_srap_power[i]),
+                         bool(solved_by_srap[i])))
@@ -16,6 +16,7 @@
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
 from typing import Union, List
+from concurrent.futures import ProcessPoolExecutor
 from GridCalEngine.Devices.multi_circuit import MultiCircuit
 from GridCalEngine.enumerations import EngineType, ContingencyMethod, SimulationTypes
 from GridCalEngine.Simulations.ContingencyAnalysis.contingency_analysis_results import ContingencyAnalysisResults
@@ -76,6 +77,10 @@ class ContingencyAnalysisDriver(DriverTemplate):
         else:
             self.linear_multiple_contingencies: LinearMultiContingencies = linear_multiple_contingencies
 
+        # process pool shared by the runs of this driver (PTDF method with options.n_processes > 1)
+        # it is set and shut down by the owner, i.e. the time series driver, if None every run creates its own
+        self.executor: Union[ProcessPoolExecutor, None] = None
+
         # N-K results
         self.results = ContingencyAnalysisResults(
             ncon=0,
@@ -134,7 +139,8 @@ class ContingencyAnalysisDriver(DriverTemplate):
                     linear_multiple_contingencies=self.linear_multiple_contingencies,
                     calling_class=self,
                     t=t,
-                    t_prob=t_prob
+                    t_prob=t_prob,
+                    executor=self.executor
                 )
 
             elif self.options.contingency_method == ContingencyMethod.HELM:
@@ -41,7 +41,8 @@ class ContingencyAnalysisOptions(OptionsTemplate):
                  detailed_massive_report: bool = False,
                  contingency_deadband: float = 0.0,
                  contingency_method=ContingencyMethod.PowerFlow,
-                 contingency_groups: Union[List[ContingencyGroup], None] = None):
+                 contingency_groups: Union[List[ContingencyGroup], None] = None,
+                 n_processes: int = 1):
         """
         ContingencyAnalysisOptions
         :param use_provided_flows: Use the provided flows?
@@ -60,6 +61,8 @@ class ContingencyAnalysisOptions(OptionsTemplate):
         :param contingency_deadband: Deadband to report contingencies
         :param contingency_method: ContingencyEngine to use (PowerFlow, PTDF, ...)
         :param contingency_groups: List of contingencies to use, if None all will be used
+        :param n_processes: Number of processes among which the contingencies are split (PTDF method and
+                            branch only contingencies, otherwise they are run in series)
         """
         OptionsTemplate.__init__(self, name="ContingencyAnalysisOptions")
 
@@ -89,6 +92,8 @@ class ContingencyAnalysisOptions(OptionsTemplate):
 
         self.contingency_groups: Union[List[ContingencyGroup], None] = contingency_groups
 
+        self.n_processes: int = n_processes
+
         self.register(key="use_provided_flows", tpe=bool)
         self.register(key="Pf", tpe=SubObjectType.Array)
         self.register(key="contingency_method", tpe=ContingencyMethod)
@@ -102,3 +107,4 @@ class ContingencyAnalysisOptions(OptionsTemplate):
         self.register(key="detailed_massive_report", tpe=bool)
         self.register(key="contingency_deadband", tpe=float)
         self.register(key="contingency_groups", tpe=SubObjectType.ObjectsList)
+        self.register(key="n_processes", tpe=int)
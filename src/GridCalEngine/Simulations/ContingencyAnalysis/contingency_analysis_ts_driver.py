@@ -28,6 +28,8 @@ from GridCalEngine.Simulations.ContingencyAnalysis.contingency_analysis_driver i
                                                                                        ContingencyAnalysisDriver)
 from GridCalEngine.Simulations.ContingencyAnalysis.contingency_analysis_ts_results import (
     ContingencyAnalysisTimeSeriesResults)
+from GridCalEngine.Simulations.ContingencyAnalysis.Methods.linear_contingency_analysis import (
+    get_contingency_process_pool)
 from GridCalEngine.enumerations import SimulationTypes
 from GridCalEngine.Simulations.driver_template import TimeSeriesDriverTemplate
 from GridCalEngine.Simulations.Clustering.clustering_results import ClusteringResults
@@ -124,45 +126,51 @@ class ContingencyAnalysisTimeSeriesDriver(TimeSeriesDriverTemplate):
 
         std_dev_counter = WeldorfOnlineStdDevMat(nrow=results.nt, ncol=results.nbranch)
 
-        for it, t in enumerate(self.time_indices):
+        if self.options.contingency_method == ContingencyMethod.PTDF and self.options.n_processes > 1:
+            # create the worker processes once for all the time steps
+            cdriver.executor = get_contingency_process_pool(n_processes=self.options.n_processes)
 
-            self.report_text('Contingency at ' + str(self.grid.time_profile[t]))
-            self.report_progress2(it, len(self.time_indices))
+        try:
+            for it, t in enumerate(self.time_indices):
 
-            if self.clustering_results is not None:
-                t_prob = self.clustering_results.sampled_probabilities[it]
-            else:
-                t_prob = 1.0/len(self.time_indices)
+                self.report_text('Contingency at ' + str(self.grid.time_profile[t]))
+                self.report_progress2(it, len(self.time_indices))
 
-            res_t = cdriver.run_at(t=t, t_prob=t_prob)
+                if self.clustering_results is not None:
+                    t_prob = self.clustering_results.sampled_probabilities[it]
+                else:
+                    t_prob = 1.0/len(self.time_indices)
 
-            results.S[it, :] = res_t.Sbus.real.max(axis=0)
+                res_t = cdriver.run_at(t=t, t_prob=t_prob)
 
-            results.max_flows[it, :] = np.abs(res_t.Sf).max(axis=0)
+                results.S[it, :] = res_t.Sbus.real.max(axis=0)
 
-            # Note: Loading is (ncon, nbranch)
+                results.max_flows[it, :] = np.abs(res_t.Sf).max(axis=0)
 
-            loading_abs = np.abs(res_t.loading)
-            overloading = loading_abs.copy()
-            overloading[overloading <= 1.0] = 0
+                # Note: Loading is (ncon, nbranch)
 
-            for k in range(results.ncon):
-                std_dev_counter.update(it, overloading[k, :])
+                loading_abs = np.abs(res_t.loading)
+                overloading = loading_abs.copy()
+                overloading[overloading <= 1.0] = 0
 
-            results.max_loading[it, :] = loading_abs.max(axis=0)
-            results.overload_count[it, :] = np.count_nonzero(overloading > 1.0)
-            results.sum_overload[it, :] = overloading.sum(axis=0)
+                for k in range(results.ncon):
+                    std_dev_counter.update(it, overloading[k, :])
 
-            results.std_dev_overload[it, :] = np.abs(res_t.loading).max(axis=0)
+                results.max_loading[it, :] = loading_abs.max(axis=0)
+                results.overload_count[it, :] = np.count_nonzero(overloading > 1.0)
+                results.sum_overload[it, :] = overloading.sum(axis=0)
 
-            results.srap_used_power += res_t.srap_used_power
-            results.report += res_t.report
+                results.std_dev_overload[it, :] = np.abs(res_t.loading).max(axis=0)
 
-            # TODO: think what to do about this
-            # results.report.merge(res_t.report)
+                results.srap_used_power += res_t.srap_used_power
+                results.report.merge(res_t.report, release=True)
 
-            if self.__cancel__:
-                return results
+                if self.__cancel__:
+                    return results
+        finally:
+            if cdriver.executor is not None:
+                cdriver.executor.shutdown()
+                cdriver.executor = None
 
         # compute the mean
         std_dev_counter.finalize()
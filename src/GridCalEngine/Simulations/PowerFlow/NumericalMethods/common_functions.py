@@ -64,6 +64,23 @@ def polar_to_rect(Vm, Va) -> CxVec:
     return Vm * np.exp(1.0j * Va)
 
 
+@nb.njit(cache=True)
+def absmax(x: Vec) -> float:
+    """
+    Infinity norm of a vector in a single pass (equivalent to norm(x, Inf))
+    :param x: vector
+    :return: max(abs(x)), NaN if any value is NaN
+    """
+    m = 0.0
+    for i in range(len(x)):
+        a = abs(x[i])
+        if a > m:
+            m = a
+        elif a != a:
+            return a  # NaN: the iterations diverged
+    return m
+
+
 @nb.njit(cache=True, fastmath=True)
 def compute_zip_power(S0: CxVec, I0: CxVec, Y0: CxVec, Vm: Vec) -> CxVec:
     """
@@ -87,6 +104,42 @@ def compute_power(Ybus: csc_matrix, V: CxVec) -> CxVec:
     return V * np.conj(Ybus @ V)
 
 
+@nb.njit(cache=True)
+def compute_power_out_numba(Ap: IntVec, Ai: IntVec, Ax: CxVec, V: CxVec, out: CxVec) -> None:
+    """
+    Compute the power from the CSC admittance matrix and the voltage, writing into a given array
+    :param Ap: Admittance matrix pointers
+    :param Ai: Admittance matrix indices
+    :param Ax: Admittance matrix data
+    :param V: Voltage vector
+    :param out: Calculated power injections (modified)
+    """
+    # accumulate the currents Ybus x V in the output
+    out[:] = 0.0
+    for j in range(len(V)):
+        for p in range(Ap[j], Ap[j + 1]):
+            out[Ai[p]] += Ax[p] * V[j]
+
+    # S = V x conj(I)
+    for i in range(len(V)):
+        out[i] = V[i] * np.conj(out[i])
+
+
+def compute_power_out(Ybus: csc_matrix, V: CxVec, out: CxVec) -> CxVec:
+    """
+    Compute the power from the admittance matrix and the voltage, without allocating the result
+    :param Ybus: Admittance matrix
+    :param V: Voltage vector
+    :param out: Array where the calculated power injections are written
+    :return: Calculated power injections (out)
+    """
+    if Ybus.format == 'csc':
+        compute_power_out_numba(Ybus.indptr, Ybus.indices, Ybus.data, V, out)
+    else:
+        out[:] = compute_power(Ybus, V)
+    return out
+
+
 @nb.njit(cache=True, fastmath=True)
 def compute_fx(Scalc: CxVec, Sbus: CxVec, pvpq: IntVec, pq: IntVec) -> Vec:
     """
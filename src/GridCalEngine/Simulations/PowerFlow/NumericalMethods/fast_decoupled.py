@@ -1,18 +1,281 @@
+import math
+import numba as nb
 import numpy as np
-from numpy import angle, conj, exp, r_, Inf
-from numpy.linalg import norm
-from scipy.sparse.linalg import splu
+from numpy import angle, conj, r_
+from scipy.sparse import csc_matrix
+from scipy.sparse.linalg import splu, SuperLU
+from typing import Tuple, Union
 import time
+import threading
 import GridCalEngine.Simulations.PowerFlow.NumericalMethods.common_functions as cf
 from GridCalEngine.Simulations.PowerFlow.power_flow_results import NumericPowerFlowResults
 from GridCalEngine.enumerations import ReactivePowerControlMode
 from GridCalEngine.Simulations.PowerFlow.NumericalMethods.discrete_controls import control_q_inside_method
+from GridCalEngine.basic_structures import IntVec, Vec, CxVec
 
 np.set_printoptions(linewidth=320)
 
 
+@nb.njit(cache=True)
+def lu_solve_numba(L_indptr: IntVec, L_indices: IntVec, L_data: Vec, L_diag: Vec,
+                   U_indptr: IntVec, U_indices: IntVec, U_data: Vec, U_diag: Vec,
+                   perm_r: IntVec, perm_c: IntVec, b: Vec) -> Vec:
+    """
+    Solve A x = b with the factors of Pr A Pc = L U (as given by SuperLU)
+    :param L_indptr: L CSC pointers
+    :param L_indices: L CSC indices
+    :param L_data: L CSC data
+    :param L_diag: L diagonal
+    :param U_indptr: U CSC pointers
+    :param U_indices: U CSC indices
+    :param U_data: U CSC data
+    :param U_diag: U diagonal
+    :param perm_r: row permutation
+    :param perm_c: column permutation
+    :param b: right hand side
+    :return: x
+    """
+    n = len(b)
+
+    # y = Pr b
+    y = np.empty(n)
+    for i in range(n):
+        y[perm_r[i]] = b[i]
+
+    # forward substitution with L (by columns)
+    for j in range(n):
+        y[j] /= L_diag[j]
+        yj = y[j]
+        for p in range(L_indptr[j], L_indptr[j + 1]):
+            i = L_indices[p]
+            if i > j:
+                y[i] -= L_data[p] * yj
+
+    # backward substitution with U (by columns)
+    for j in range(n - 1, -1, -1):
+        y[j] /= U_diag[j]
+        yj = y[j]
+        for p in range(U_indptr[j], U_indptr[j + 1]):
+            i = U_indices[p]
+            if i < j:
+                y[i] -= U_data[p] * yj
+
+    # x = Pc y
+    x = np.empty(n)
+    for i in range(n):
+        x[i] = y[perm_c[i]]
+
+    return x
+
+
+class LUSolver:
+    """
+    Solver that reuses the triangular factors of a SuperLU factorization
+    with a compiled forward-backward substitution, avoiding the SuperLU call overhead
+    """
+
+    def __init__(self, factorization: SuperLU):
+        """
+        Constructor
+        :param factorization: SuperLU factorization
+        """
+        L = factorization.L
+        U = factorization.U
+        self.L_indptr: IntVec = L.indptr
+        self.L_indices: IntVec = L.indices
+        self.L_data: Vec = L.data
+        self.L_diag: Vec = L.diagonal()
+        self.U_indptr: IntVec = U.indptr
+        self.U_indices: IntVec = U.indices
+        self.U_data: Vec = U.data
+        self.U_diag: Vec = U.diagonal()
+        self.perm_r: IntVec = factorization.perm_r
+        self.perm_c: IntVec = factorization.perm_c
+
+    def solve(self, b: Vec) -> Vec:
+        """
+        Solve A x = b
+        :param b: right hand side
+        :return: x
+        """
+        return lu_solve_numba(self.L_indptr, self.L_indices, self.L_data, self.L_diag,
+                              self.U_indptr, self.U_indices, self.U_data, self.U_diag,
+                              self.perm_r, self.perm_c, b)
+
+
+def _same_sparse(A: csc_matrix, key: Union[Tuple[Tuple[int, int], IntVec, IntVec, Vec], None]) -> bool:
+    """
+    Check if a sparse matrix has the same structure and values as a stored key
+    :param A: sparse matrix
+    :param key: (shape, indptr, indices, data) copies of the stored matrix, or None
+    :return: True if equal
+    """
+    if key is None:
+        return False
+    shape, indptr, indices, data = key
+    return (A.shape == shape
+            and np.array_equal(A.indptr, indptr)
+            and np.array_equal(A.indices, indices)
+            and np.array_equal(A.data, data))
+
+
+def _sparse_key(A: csc_matrix) -> Tuple[Tuple[int, int], IntVec, IntVec, Vec]:
+    """
+    Copy the data that identifies a sparse matrix
+    :param A: sparse matrix
+    :return: (shape, indptr, indices, data) copies
+    """
+    return A.shape, A.indptr.copy(), A.indices.copy(), A.data.copy()
+
+
+def factorize_fdpf_blocks(B1: csc_matrix, B2: csc_matrix,
+                          blck1_idx: IntVec, blck2_idx: IntVec, blck3_idx: IntVec) -> Tuple[LUSolver, LUSolver]:
+    """
+    Factorize the B1[blck1, blck1] and B2[blck3, blck2] blocks
+    :param B1: B' matrix
+    :param B2: B'' matrix
+    :param blck1_idx: indices of the buses whose angle is solved
+    :param blck2_idx: indices of the buses whose module is solved
+    :param blck3_idx: indices of the buses with reactive power equations
+    :return: B1 block factorization, B2 block factorization
+    """
+    return (LUSolver(splu(B1[np.ix_(blck1_idx, blck1_idx)])),
+            LUSolver(splu(B2[np.ix_(blck3_idx, blck2_idx)])))
+
+
+class FastDecoupledFactorizations:
+    """
+    Keeps the last factorization of the B' and B'' blocks, so that repeated calls to FDPF
+    with the same matrices (i.e. time series or contingencies over the same topology)
+    only solve instead of factorizing again.
+    The owner of the matrices (i.e. a driver) creates one and passes it to FDPF
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.B1_key: Union[Tuple[Tuple[int, int], IntVec, IntVec, Vec], None] = None
+        self.B2_key: Union[Tuple[Tuple[int, int], IntVec, IntVec, Vec], None] = None
+        self.blck1_idx: Union[IntVec, None] = None
+        self.blck2_idx: Union[IntVec, None] = None
+        self.blck3_idx: Union[IntVec, None] = None
+        self.B1_factorization: Union[LUSolver, None] = None
+        self.B2_factorization: Union[LUSolver, None] = None
+        self._lock = threading.Lock()
+
+    def get(self, B1: csc_matrix, B2: csc_matrix,
+            blck1_idx: IntVec, blck2_idx: IntVec, blck3_idx: IntVec) -> Tuple[LUSolver, LUSolver]:
+        """
+        Get the factorizations of B1[blck1, blck1] and B2[blck3, blck2].
+        They are only computed if the matrices' values (not just the objects)
+        or the block indices have changed since the last call
+        :param B1: B' matrix
+        :param B2: B'' matrix
+        :param blck1_idx: indices of the buses whose angle is solved
+        :param blck2_idx: indices of the buses whose module is solved
+        :param blck3_idx: indices of the buses with reactive power equations
+        :return: B1 block factorization, B2 block factorization
+        """
+        with self._lock:
+            if not (np.array_equal(blck1_idx, self.blck1_idx)
+                    and np.array_equal(blck2_idx, self.blck2_idx)
+                    and np.array_equal(blck3_idx, self.blck3_idx)
+                    and _same_sparse(B1, self.B1_key)
+                    and _same_sparse(B2, self.B2_key)):
+                self.B1_factorization, self.B2_factorization = factorize_fdpf_blocks(B1, B2, blck1_idx,
+                                                                                     blck2_idx, blck3_idx)
+                self.B1_key = _sparse_key(B1)
+                self.B2_key = _sparse_key(B2)
+                self.blck1_idx = blck1_idx.copy()
+                self.blck2_idx = blck2_idx.copy()
+                self.blck3_idx = blck3_idx.copy()
+
+            return self.B1_factorization, self.B2_factorization
+
+
+@nb.njit(cache=True)
+def update_polar_voltage(voltage: CxVec, Vm: Vec, Va: Vec, idx: IntVec) -> None:
+    """
+    Update in-place the complex voltage of the given buses from their module and angle
+    :param voltage: complex voltage (modified)
+    :param Vm: voltage module
+    :param Va: voltage angle (radians)
+    :param idx: indices of the buses to update
+    """
+    for k in idx:
+        voltage[k] = complex(Vm[k] * math.cos(Va[k]), Vm[k] * math.sin(Va[k]))
+
+
+@nb.njit(cache=True)
+def get_fdpf_mismatch_blocks(Scalc: CxVec, Sbus: CxVec, Vm: Vec, blck1_idx: IntVec, blck3_idx: IntVec,
+                             dP: Vec, dQ: Vec) -> None:
+    """
+    Compute the active and reactive power mismatch blocks ((Scalc - Sbus) / Vm) into the given arrays
+    Since Vm is real, only the needed real or imaginary parts are divided
+    :param Scalc: Calculated power injections
+    :param Sbus: Specified power injections
+    :param Vm: Voltage module
+    :param blck1_idx: indices of the buses whose angle is solved
+    :param blck3_idx: indices of the buses whose reactive power is solved
+    :param dP: Active power mismatch of the block 1 buses (modified)
+    :param dQ: Reactive power mismatch of the block 3 buses (modified)
+    """
+    for k in range(len(blck1_idx)):
+        i = blck1_idx[k]
+        dP[k] = (Scalc[i].real - Sbus[i].real) / Vm[i]
+
+    for k in range(len(blck3_idx)):
+        i = blck3_idx[k]
+        dQ[k] = (Scalc[i].imag - Sbus[i].imag) / Vm[i]
+
+
+@nb.njit(cache=True)
+def compute_fdpf_mismatch_numba(Ap: IntVec, Ai: IntVec, Ax: CxVec, V: CxVec, Sbus: CxVec, Vm: Vec,
+                                blck1_idx: IntVec, blck3_idx: IntVec, Scalc: CxVec, dP: Vec, dQ: Vec) -> None:
+    """
+    Compute the calculated power and the fast decoupled power mismatch blocks in one call
+    :param Ap: Admittance matrix CSC pointers
+    :param Ai: Admittance matrix CSC indices
+    :param Ax: Admittance matrix CSC data
+    :param V: Voltage vector
+    :param Sbus: Specified power injections
+    :param Vm: Voltage module
+    :param blck1_idx: indices of the buses whose angle is solved
+    :param blck3_idx: indices of the buses whose reactive power is solved
+    :param Scalc: Calculated power injections (modified)
+    :param dP: Active power mismatch of the block 1 buses (modified)
+    :param dQ: Reactive power mismatch of the block 3 buses (modified)
+    """
+    cf.compute_power_out_numba(Ap, Ai, Ax, V, Scalc)
+    get_fdpf_mismatch_blocks(Scalc, Sbus, Vm, blck1_idx, blck3_idx, dP, dQ)
+
+
+def compute_fdpf_mismatch(Ybus: csc_matrix, V: CxVec, Sbus: CxVec, Vm: Vec, blck1_idx: IntVec, blck3_idx: IntVec,
+                          Scalc: CxVec, dP: Vec, dQ: Vec) -> None:
+    """
+    Compute the calculated power and the fast decoupled power mismatch blocks into the given arrays
+    :param Ybus: Admittance matrix
+    :param V: Voltage vector
+    :param Sbus: Specified power injections
+    :param Vm: Voltage module
+    :param blck1_idx: indices of the buses whose angle is solved
+    :param blck3_idx: indices of the buses whose reactive power is solved
+    :param Scalc: Calculated power injections (modified)
+    :param dP: Active power mismatch of the block 1 buses (modified)
+    :param dQ: Reactive power mismatch of the block 3 buses (modified)
+    """
+    if Ybus.format == 'csc':
+        compute_fdpf_mismatch_numba(Ybus.indptr, Ybus.indices, Ybus.data, V, Sbus, Vm,
+                                    blck1_idx, blck3_idx, Scalc, dP, dQ)
+    else:
+        cf.compute_power_out(Ybus, V, out=Scalc)
+        get_fdpf_mismatch_blocks(Scalc, Sbus, Vm, blck1_idx, blck3_idx, dP, dQ)
+
+
 def FDPF(Vbus, S0, I0, Y0, Ybus, B1, B2, pv_, pq_, pqv_, p_, Qmin, Qmax, tol=1e-9, max_it=100,
-         control_q=ReactivePowerControlMode.NoControl, ) -> NumericPowerFlowResults:
+         control_q=ReactivePowerControlMode.NoControl,
+         factorizations: Union[FastDecoupledFactorizations, None] = None) -> NumericPowerFlowResults:
     """
     Fast decoupled power flow
     :param Vbus: array of initial voltages
@@ -31,6 +294,8 @@ def FDPF(Vbus, S0, I0, Y0, Ybus, B1, B2, pv_, pq_, pqv_, p_, Qmin, Qmax, tol=1e-
     :param tol: desired tolerance
     :param max_it: maximum number of iterations
     :param control_q: Control Q method
+    :param factorizations: FastDecoupledFactorizations held by the caller to reuse them across calls (optional),
+                           if None the blocks are factorized for this call only
     :return: NumericPowerFlowResults instance
     """
 
@@ -51,67 +316,74 @@ def FDPF(Vbus, S0, I0, Y0, Ybus, B1, B2, pv_, pq_, pqv_, p_, Qmin, Qmax, tol=1e-
     blck3_idx = np.r_[pq, pqv]
     n_block1 = len(blck1_idx)
 
-    # Factorize B1 and B2
-    B1_factorization = splu(B1[np.ix_(blck1_idx, blck1_idx)])
-    B2_factorization = splu(B2[np.ix_(blck3_idx, blck2_idx)])
+    # Factorize B1 and B2 (or reuse the last factorizations)
+    if factorizations is None:
+        B1_factorization, B2_factorization = factorize_fdpf_blocks(B1, B2, blck1_idx, blck2_idx, blck3_idx)
+    else:
+        B1_factorization, B2_factorization = factorizations.get(B1, B2, blck1_idx, blck2_idx, blck3_idx)
 
     # evaluate initial mismatch
+    # the calculated power and the mismatch buffers are reused across the iterations
+    Scalc = np.empty_like(voltage)
+    dP = np.empty(len(blck1_idx))
+    dQ = np.empty(len(blck3_idx))
     Sbus = cf.compute_zip_power(S0, I0, Y0, Vm)  # compute the ZIP power injection
-    Scalc = voltage * np.conj(Ybus * voltage)
-    mis = (Scalc - Sbus) / Vm  # complex power mismatch
-    dP = mis[blck1_idx].real
-    dQ = mis[blck3_idx].imag
+    compute_fdpf_mismatch(Ybus, voltage, Sbus, Vm, blck1_idx, blck3_idx, Scalc, dP, dQ)  # power mismatch
 
     if n_block1 > 0:
-        normP = norm(dP, Inf)
-        normQ = norm(dQ, Inf)
+        normP = cf.absmax(dP)
+        normQ = cf.absmax(dQ)
         converged = normP < tol and normQ < tol
 
         # iterate
+        # a half iteration whose mismatch has already converged is skipped (its voltages are not updated),
+        # and the injections and the calculated power are only recomputed if their voltages changed
         iter_ = 0
         while not converged and iter_ < max_it:
 
             iter_ += 1
+            va_dirty = False
+            vm_dirty = False
 
             # ----------------------------- P iteration to update Va ----------------------
-            # solve voltage angles
-            dVa = B1_factorization.solve(dP)
-
-            # update voltage
-            Va[blck1_idx] -= dVa
-            voltage = Vm * exp(1j * Va)
-
-            # evaluate mismatch
-            # (Sbus does not change here since Vm is fixed ...)
-            Scalc = cf.compute_power(Ybus, voltage)
-            mis = (Scalc - Sbus) / Vm  # complex power mismatch
-            dP = mis[blck1_idx].real
-            dQ = mis[blck3_idx].imag
-            normP = norm(dP, Inf)
-            normQ = norm(dQ, Inf)
+            if normP >= tol:
+                # solve voltage angles
+                dVa = B1_factorization.solve(dP)
+
+                # update voltage
+                Va[blck1_idx] -= dVa
+                update_polar_voltage(voltage, Vm, Va, blck1_idx)
+                va_dirty = True
+
+            if va_dirty:
+                # evaluate mismatch
+                # (Sbus does not change here since Vm is fixed ...)
+                compute_fdpf_mismatch(Ybus, voltage, Sbus, Vm, blck1_idx, blck3_idx, Scalc, dP, dQ)
+                normP = cf.absmax(dP)
+                normQ = cf.absmax(dQ)
 
             if normP < tol and normQ < tol:
                 converged = True
             else:
                 # ----------------------------- Q iteration to update Vm ----------------------
-                # Solve voltage modules
-                dVm = B2_factorization.solve(dQ)
+                if normQ >= tol:
+                    # Solve voltage modules
+                    dVm = B2_factorization.solve(dQ)
 
-                # update voltage
-                Vm[blck2_idx] -= dVm
-                voltage = Vm * exp(1j * Va)
+                    # update voltage
+                    Vm[blck2_idx] -= dVm
+                    update_polar_voltage(voltage, Vm, Va, blck2_idx)
+                    vm_dirty = True
 
-                # evaluate mismatch
-                Sbus = cf.compute_zip_power(S0, I0, Y0, Vm)  # compute the ZIP power injection
-                Scalc = cf.compute_power(Ybus, voltage)
-                mis = (Scalc - Sbus) / Vm  # complex power mismatch
-                dP = mis[blck1_idx].real
-                dQ = mis[blck3_idx].imag
-                normP = norm(dP, Inf)
-                normQ = norm(dQ, Inf)
+                if vm_dirty:
+                    # evaluate mismatch
+                    Sbus = cf.compute_zip_power(S0, I0, Y0, Vm)  # compute the ZIP power injection
+                    compute_fdpf_mismatch(Ybus, voltage, Sbus, Vm, blck1_idx, blck3_idx, Scalc, dP, dQ)
+                    normP = cf.absmax(dP)
+                    normQ = cf.absmax(dQ)
 
-                if normP < tol and normQ < tol:
-                    converged = True
+                    if normP < tol and normQ < tol:
+                        converged = True
 
             # control of Q limits --------------------------------------------------------------------------------------
             # review reactive power limits
@@ -132,11 +404,22 @@ def FDPF(Vbus, S0, I0, Y0, Ybus, B1, B2, pv_, pq_, pqv_, p_, Qmin, Qmax, tol=1e-
                     blck3_idx = np.r_[pq, pqv]
 
                     # Factorize B1 and B2
-                    B1_factorization = splu(B1[np.ix_(blck1_idx, blck1_idx)])
-                    B2_factorization = splu(B2[np.ix_(blck3_idx, blck2_idx)])
+                    if factorizations is None:
+                        B1_factorization, B2_factorization = factorize_fdpf_blocks(B1, B2, blck1_idx,
+                                                                                   blck2_idx, blck3_idx)
+                    else:
+                        B1_factorization, B2_factorization = factorizations.get(B1, B2,
+                                                                                blck1_idx, blck2_idx, blck3_idx)
+
+                    # recompute the mismatch blocks with the new block ordering
+                    dP = np.empty(len(blck1_idx))
+                    dQ = np.empty(len(blck3_idx))
+                    get_fdpf_mismatch_blocks(Scalc, Sbus, Vm, blck1_idx, blck3_idx, dP, dQ)
+                    normP = cf.absmax(dP)
+                    normQ = cf.absmax(dQ)
 
         F = r_[dP, dQ]  # concatenate again
-        normF = norm(F, Inf)
+        normF = cf.absmax(F)
 
     else:
         converged = True
@@ -16,13 +16,14 @@
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
 import numpy as np
-from typing import Union
+from typing import Union, Dict
 from GridCalEngine.Simulations.PowerFlow.power_flow_ts_results import PowerFlowTimeSeriesResults
 from GridCalEngine.Devices.multi_circuit import MultiCircuit
 from GridCalEngine.Simulations.PowerFlow.power_flow_options import PowerFlowOptions
 from GridCalEngine.Simulations.driver_template import TimeSeriesDriverTemplate
 from GridCalEngine.Simulations.Clustering.clustering_results import ClusteringResults
 import GridCalEngine.Simulations.PowerFlow.power_flow_worker as pf_worker
+from GridCalEngine.Simulations.PowerFlow.NumericalMethods.fast_decoupled import FastDecoupledFactorizations
 from GridCalEngine.Compilers.circuit_to_bentayga import bentayga_pf
 from GridCalEngine.Compilers.circuit_to_newton_pa import newton_pa_pf
 from GridCalEngine.Compilers.circuit_to_pgm import pgm_pf
@@ -97,6 +98,10 @@ class PowerFlowTimeSeriesDriver(TimeSeriesDriverTemplate):
         # compile dictionaries once for speed
         bus_dict = {bus: i for i, bus in enumerate(self.grid.buses)}
         areas_dict = {elm: i for i, elm in enumerate(self.grid.areas)}
+
+        # fast decoupled factorizations of each island, reused while the topology does not change
+        fdpf_factorizations: Dict[int, FastDecoupledFactorizations] = dict()
+
         self.report_progress(0.0)
         for it, t in enumerate(time_indices):
 
@@ -109,7 +114,8 @@ class PowerFlowTimeSeriesDriver(TimeSeriesDriverTemplate):
                                                options=self.options,
                                                opf_results=self.opf_time_series_results,
                                                bus_dict=bus_dict,
-                                               areas_dict=areas_dict)
+                                               areas_dict=areas_dict,
+                                               fdpf_factorizations=fdpf_factorizations)
 
             # gather results
             time_series_results.voltage[it, :] = pf_res.voltage
@@ -32,6 +32,7 @@ from GridCalEngine.DataStructures.numerical_circuit import (
 from GridCalEngine.Devices.Substation.bus import Bus
 from GridCalEngine.Devices.Aggregation.area import Area
 from GridCalEngine.basic_structures import CxVec, Vec, IntVec, CscMat
+from GridCalEngine.Simulations.PowerFlow.NumericalMethods.fast_decoupled import FastDecoupledFactorizations
 
 if TYPE_CHECKING:  # Only imports the below statements during type checking
     from GridCalEngine.Simulations.OPF.opf_results import OptimalPowerFlowResults
@@ -55,7 +56,8 @@ def solve(circuit: NumericalCircuit,
           pqpv: IntVec,
           Qmin: Vec,
           Qmax: Vec,
-          logger=Logger()) -> NumericPowerFlowResults:
+          logger=Logger(),
+          fdpf_factorizations: Union[FastDecoupledFactorizations, None] = None) -> NumericPowerFlowResults:
     """
     Run a power flow simulation using the selected method (no outer loop controls).
     :param circuit: SnapshotData circuit, this ensures on-demand admittances computation
@@ -77,6 +79,7 @@ def solve(circuit: NumericalCircuit,
     :param Qmin: Array of minimum reactive power capability per bus
     :param Qmax: Array of maximum reactive power capability per bus
     :param logger: Logger
+    :param fdpf_factorizations: FastDecoupledFactorizations to reuse in the fast decoupled method (optional)
     :return: NumericPowerFlowResults 
     """
 
@@ -226,7 +229,8 @@ def solve(circuit: NumericalCircuit,
                                  Qmax=Qmax,
                                  tol=options.tolerance,
                                  max_it=options.max_iter,
-                                 control_q=options.control_Q)
+                                 control_q=options.control_Q,
+                                 factorizations=fdpf_factorizations)
 
         # Newton-Raphson (full)
         elif solver_type == SolverType.NR:
@@ -361,7 +365,8 @@ def single_island_pf(circuit: NumericalCircuit, options: PowerFlowOptions,
                      vd: IntVec,
                      pqpv: IntVec,
                      Qmin: Vec,
-                     Qmax: Vec, logger=Logger()) -> "PowerFlowResults":
+                     Qmax: Vec, logger=Logger(),
+                     fdpf_factorizations: Union[FastDecoupledFactorizations, None] = None) -> "PowerFlowResults":
     """
     Run a power flow simulation for a single circuit using the
     selected outer loop controls.
@@ -385,6 +390,7 @@ def single_island_pf(circuit: NumericalCircuit, options: PowerFlowOptions,
     :param Qmin: Array of minimum reactive power capability per bus
     :param Qmax: Array of maximum reactive power capability per bus
     :param logger: Logger object
+    :param fdpf_factorizations: FastDecoupledFactorizations to reuse in the fast decoupled method (optional)
     :return: PowerFlowResults instance
     """
 
@@ -431,7 +437,8 @@ def single_island_pf(circuit: NumericalCircuit, options: PowerFlowOptions,
                          pqpv=pqpv,
                          Qmin=Qmin,
                          Qmax=Qmax,
-                         logger=logger)
+                         logger=logger,
+                         fdpf_factorizations=fdpf_factorizations)
 
         if options.distributed_slack:
             # Distribute the slack power
@@ -460,7 +467,8 @@ def single_island_pf(circuit: NumericalCircuit, options: PowerFlowOptions,
                                  pqpv=pqpv,
                                  Qmin=Qmin,
                                  Qmax=Qmax,
-                                 logger=logger)
+                                 logger=logger,
+                                 fdpf_factorizations=fdpf_factorizations)
 
     # Compute the Branches power and the slack buses power
     Sfb, Stb, If, It, Vbranch, loading, losses, S0 = power_flow_post_process(calculation_inputs=circuit,
@@ -593,7 +601,9 @@ def multi_island_pf_nc(nc: NumericalCircuit,
                        options: PowerFlowOptions,
                        logger=Logger(),
                        V_guess: Union[CxVec, None] = None,
-                       Sbus_input: Union[CxVec, None] = None) -> PowerFlowResults:
+                       Sbus_input: Union[CxVec, None] = None,
+                       fdpf_factorizations: Union[Dict[int, FastDecoupledFactorizations], None] = None
+                       ) -> PowerFlowResults:
     """
     Multiple islands power flow (this is the most generic power flow function)
     :param nc: SnapshotData instance
@@ -601,6 +611,8 @@ def multi_island_pf_nc(nc: NumericalCircuit,
     :param logger: logger
     :param V_guess: voltage guess
     :param Sbus_input: Use this power injections if provided
+    :param fdpf_factorizations: dictionary of FastDecoupledFactorizations per island index, held by the caller
+                                to reuse the fast decoupled factorizations across calls (optional, filled here)
     :return: PowerFlowResults instance
     """
 
@@ -670,7 +682,9 @@ def multi_island_pf_nc(nc: NumericalCircuit,
                     pqpv=island.pqpv,
                     Qmin=island.Qmin_bus,
                     Qmax=island.Qmax_bus,
-                    logger=logger
+                    logger=logger,
+                    fdpf_factorizations=(None if fdpf_factorizations is None
+                                         else fdpf_factorizations.setdefault(i, FastDecoupledFactorizations()))
                 )
 
                 # merge the results from this island
@@ -753,7 +767,9 @@ def multi_island_pf(multi_circuit: MultiCircuit,
                     t: Union[int, None] = None,
                     logger: Logger = Logger(),
                     bus_dict: Union[Dict[Bus, int], None] = None,
-                    areas_dict: Union[Dict[Area, int], None] = None) -> PowerFlowResults:
+                    areas_dict: Union[Dict[Area, int], None] = None,
+                    fdpf_factorizations: Union[Dict[int, FastDecoupledFactorizations], None] = None
+                    ) -> PowerFlowResults:
     """
     Multiple islands power flow (this is the most generic power flow function)
     :param multi_circuit: MultiCircuit instance
@@ -763,6 +779,8 @@ def multi_island_pf(multi_circuit: MultiCircuit,
     :param logger: list of events to add to
     :param bus_dict: Dus object to index dictionary
     :param areas_dict: Area to area index dictionary
+    :param fdpf_factorizations: dictionary of FastDecoupledFactorizations per island index, held by the caller
+                                to reuse the fast decoupled factorizations across calls (optional, filled here)
     :return: PowerFlowResults instance
     """
 
@@ -795,6 +813,6 @@ def multi_island_pf(multi_circuit: MultiCircuit,
         )
         # print("Normal PowerFlow")
 
-    res = multi_island_pf_nc(nc=nc, options=options, logger=logger)
+    res = multi_island_pf_nc(nc=nc, options=options, logger=logger, fdpf_factorizations=fdpf_factorizations)
 
     return res
@@ -14,13 +14,11 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program; if not, write to the Free Software Foundation,
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
-import uuid
 import warnings
 from typing import List, Union, Tuple, Iterable
 import numpy as np
-from uuid import uuid4
 
-from scipy.sparse import csc_matrix
+from scipy.sparse import csc_matrix, csr_matrix, spmatrix
 from GridCalEngine.Utils.MIP.SimpleMip.lpobjects import LpExp, LpCst, LpVar
 from GridCalEngine.Utils.MIP.SimpleMip.highs import HIGHS_AVAILABLE, solve_with_highs
 from GridCalEngine.basic_structures import Vec, Logger
@@ -133,7 +131,9 @@ class LpModel:
         :param is_int:
         :return: Variable instance
         """
-        var = LpVar(name=name, lower_bound=lb, upper_bound=ub, is_integer=is_int, hash_id=uuid4().int)
+        # the compact index of the variable is its position in the model
+        var = LpVar(name=name, lower_bound=lb, upper_bound=ub, is_integer=is_int,
+                    internal_idx=len(self.variables))
         self.variables.append(var)
         return var
 
@@ -176,7 +176,8 @@ class LpModel:
         :param expression: Expression
         :param is_minimize: minimize?
         """
-        self.objective = expression
+        # copy, so that later in-place operations on the expression do not modify the objective
+        self.objective = expression.copy()
         self._is_minimize = is_minimize
 
     def minimize(self, obj_function: LpExp):
@@ -207,15 +208,41 @@ class LpModel:
         else:
             raise ValueError("Only Constraint instances can be added.")
 
+    def add_matrix_csts(self, A: spmatrix, variables: List[LpVar], sense: str,
+                        rhs: Union[Vec, float], name: str = "") -> List[LpCst]:
+        """
+        Add the constraints A x (sense) rhs at once, building every row directly from the sparse matrix
+        :param A: sparse matrix of coefficients (n constraints, len(variables))
+        :param variables: list of variables matching the columns of A
+        :param sense: <=, ==, >=
+        :param rhs: right hand side value (array of n values or a single value for all)
+        :param name: base name of the constraints (optional)
+        :return: list of the added constraints
+        """
+        A = csr_matrix(A)
+        A.sum_duplicates()
+        n = A.shape[0]
+        rhs = np.broadcast_to(rhs, n)
+
+        csts = list()
+        for i in range(n):
+            a, b = A.indptr[i], A.indptr[i + 1]
+            expr = LpExp.from_arrays(A.indices[a:b], A.data[a:b], variables)
+            cst = LpCst(linear_expression=expr, sense=sense, coefficient=float(rhs[i]), name=f"{name}_{i}")
+            csts.append(cst)
+
+        self.constraints.extend(csts)
+        return csts
+
     @staticmethod
     def sum(expr: Union[LpExp, Iterable]) -> LpExp:
         """
         create sum of the expression
         :param expr: LpExp object (or general expression)
-        :return: LpExp object
+        :return: LpExp object (always a new one, so that adding to it in place does not modify expr)
         """
         if isinstance(expr, LpExp):
-            return expr
+            return expr.copy()
         elif isinstance(expr, Iterable):
             res = LpExp()
             for elm in expr:
@@ -381,38 +408,57 @@ class LpModel:
     def get_coefficients_data(self) -> Tuple[np.ndarray, csc_matrix, np.ndarray]:
         """
         Returns the coefficients matrix
-        :return:
+        The variables' compact indices (assigned when they are added to the model) are used as columns
+        :return: constraints lower bounds, A matrix (CSC), constraints upper bounds
         """
 
-        # Initialize lists to hold the row indices, column indices, and data for the A matrix
-        row_indices = []
-        col_indices = []
-        data = []
-
         n = len(self.constraints)
         lower = np.empty(n)
         upper = np.empty(n)
+        nnz = np.empty(n, dtype=int)
 
-        # Iterate through each constraint, populating the lists
         for i, constraint in enumerate(self.constraints):
-
             lower[i], upper[i] = constraint.get_bounds()
             constraint.set_index(i)
-
-            for var, coeff in constraint.linear_expression.terms.items():
-                if var is not None:  # Skip if it's the constant term
-                    # Row index is the constraint number
-                    row_indices.append(i)
-
-                    # Column index is the variable's index
-                    col_indices.append(self.variables.index(var))
-
-                    # Coefficient is the data
-                    data.append(coeff)
-
-        # Create the A matrix in CSC format
+            nnz[i] = len(constraint.linear_expression.terms)
+
+        # flatten the terms of all the constraints into COO triplets:
+        # the row index is the constraint number and the column index is the variable's compact index
+        n_terms = int(nnz.sum())
+        row_indices = np.repeat(np.arange(n), nnz)
+        col_indices = np.fromiter((var.get_index()
+                                   for constraint in self.constraints
+                                   for var in constraint.linear_expression.terms),
+                                  dtype=int, count=n_terms)
+        data = np.fromiter((coeff
+                            for constraint in self.constraints
+                            for coeff in constraint.linear_expression.terms.values()),
+                           dtype=float, count=n_terms)
+
+        # every variable must be one of this model's, at its own column. Otherwise a foreign variable
+        # (or one with the default index) would silently be written in the column of another variable
+        n_vars = len(self.variables)
+        term_hashes = np.fromiter((hash(var)
+                                   for constraint in self.constraints
+                                   for var in constraint.linear_expression.terms),
+                                  dtype=np.int64, count=n_terms)
+        var_hashes = np.fromiter((hash(var) for var in self.variables), dtype=np.int64, count=n_vars)
+        valid = (col_indices >= 0) & (col_indices < n_vars)
+        valid[valid] = var_hashes[col_indices[valid]] == term_hashes[valid]
+
+        if not valid.all():
+            k = int(np.argmin(valid))
+            i = int(row_indices[k])
+            var = list(self.constraints[i].linear_expression.terms)[k - int(nnz[:i].sum())]
+            raise Exception(f"The variable {var.name} of the constraint {self.constraints[i].name} "
+                            f"does not belong to this model")
+
+        # Create the A matrix in CSC format (repeated entries are summed)
         A_csc = csc_matrix((data, (row_indices, col_indices)),
-                           shape=(len(self.constraints), len(self.variables)))
+                           shape=(n, len(self.variables)))
+
+        # terms that cancelled out (i.e. A - A) are not passed to the solver
+        A_csc.eliminate_zeros()
 
         return lower, A_csc, upper
 
@@ -513,7 +559,7 @@ class LpModel:
                 if debug_optimal:
 
                     # pick the original objectve function
-                    main_f = self.objective
+                    main_f = self.objective.copy()
 
                     for i, sl in enumerate(slacks):
 
@@ -15,14 +15,24 @@
 # along with this program; if not, write to the Free Software Foundation,
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 from __future__ import annotations
-from typing import Union, Dict, Tuple
-from uuid import uuid4
+from typing import Union, Dict, Tuple, List
+from itertools import count
+import numpy as np
+from GridCalEngine.basic_structures import Vec, IntVec
+
+# process-wide source of unique variable hash ids
+_var_hash_ids = count()
+
+# value used as infinite bound of the constraints
+MIP_INF = 1e20
 
 
 class LpVar:
     """
     Variable
     """
+    __slots__ = ('name', 'lower_bound', 'upper_bound', 'is_integer', '_index', '_hash_id')
+
     def __init__(self,
                  name: str,
                  lower_bound: float = 0.0,
@@ -44,7 +54,7 @@ class LpVar:
         self.upper_bound: float = upper_bound
         self.is_integer: bool = is_integer  # Indicates if the variable is an integer
         self._index: int = internal_idx  # internal index to the solver
-        self._hash_id: int = uuid4().int if hash_id is None else hash_id
+        self._hash_id: int = next(_var_hash_ids) if hash_id is None else hash_id
 
     def set_index(self, index: int) -> None:
         """
@@ -84,17 +94,17 @@ class LpVar:
 
     def _comparison(self, sense: str, other: Union["LpExp", LpVar, float, int]) -> LpCst:
 
-        if isinstance(other, (int, float)):
-            combined_expression = LpExp(self)
-            combined_expression.offset -= other
-            return LpCst(combined_expression, sense, 0)
+        t = type(other)
+        if t is float or t is int or isinstance(other, (int, float)):
+            return LpCst(LpExp(self), sense, other)
 
-        elif isinstance(other, LpVar):
-            combined_expression = LpExp(self) - LpExp(other)
+        elif t is LpVar:
+            combined_expression = LpExp(self).add_term_inplace(other, -1.0)
             return LpCst(combined_expression, sense, 0)
 
-        elif isinstance(other, LpExp):
-            combined_expression = LpExp(self) - other
+        elif t is LpExp:
+            combined_expression = LpExp(self)
+            combined_expression -= other
             return LpCst(linear_expression=combined_expression,
                          sense=sense,
                          coefficient=-combined_expression.offset)
@@ -115,20 +125,26 @@ class LpVar:
             return self._comparison(sense="==", other=other)
 
     def __add__(self, other):
-        return LpExp(self) + other
+        e = LpExp(self)
+        e += other
+        return e
 
     def __radd__(self, other):
-        return LpExp(self) + other
+        return self.__add__(other)
 
-    def __mul__(self, other: Union[int, float]) -> Union["LpExp", float]:
+    def __mul__(self, other: Union[int, float, np.ndarray]) -> Union["LpExp", float, np.ndarray]:
         """
         Multiply this variable with a int or float
-        :param other:
-        :return:
+        :param other: int, float or array of coefficients
+        :return: LpExp (0.0 if multiplied by zero), or array of LpExp if other is an array
         """
-        if isinstance(other, (int, float)):
+        t = type(other)
+        if t is float or t is int or isinstance(other, (int, float)):
             return LpExp(self, other) if other != 0 else 0.0
 
+        elif isinstance(other, np.ndarray):
+            return LpExp(self) * other
+
         raise ValueError("Can only multiply a Variable by a scalar")
 
     def __rmul__(self, other):
@@ -141,7 +157,7 @@ class LpVar:
         :return:
         """
         if isinstance(other, LpVar):
-            return LpExp(self) - LpExp(other)
+            return LpExp(self).add_term_inplace(other, -1.0)
         elif isinstance(other, LpExp):
             return LpExp(self) - other
         elif isinstance(other, (int, float)):
@@ -167,6 +183,8 @@ class LpCst:
     """
     Constraint
     """
+    __slots__ = ('name', 'linear_expression', '_sense', '_coefficient', '_lb', '_ub', '_index')
+
     def __init__(self, linear_expression: LpExp, sense: str, coefficient: float,
                  name="", internal_index: int = 0):
         """
@@ -178,14 +196,42 @@ class LpCst:
         :param name:
         :param internal_index:
         """
-        assert sense in ["<=", "==", ">="]
-
         self.name = name
         self.linear_expression = linear_expression
-        self.sense = sense
-        self.coefficient = coefficient  # Right-hand side value
+        self._sense = sense
+        self._coefficient = coefficient  # Right-hand side value
         self._index: int = internal_index  # internal index to the solver
 
+        # bounds (lhs, rhs) computed once, and again only if the sense or the coefficient change
+        # (this also validates the sense)
+        self._lb: float = 0.0
+        self._ub: float = 0.0
+        self._update_bounds()
+
+    @property
+    def sense(self) -> str:
+        """
+        Sense of the constraint: <=, ==, >=
+        """
+        return self._sense
+
+    @sense.setter
+    def sense(self, value: str):
+        self._sense = value
+        self._update_bounds()
+
+    @property
+    def coefficient(self) -> float:
+        """
+        Right-hand side value
+        """
+        return self._coefficient
+
+    @coefficient.setter
+    def coefficient(self, value: float):
+        self._coefficient = value
+        self._update_bounds()
+
     @property
     def terms(self):
         """
@@ -196,29 +242,34 @@ class LpCst:
 
     def copy(self) -> "LpCst":
         """
-        Make a deep copy of this constraint
+        Make a copy of this constraint (with a copy of its expression, sharing the variables)
         :return: Constraint
         """
         return LpCst(linear_expression=self.linear_expression.copy(),
-                     sense=self.sense,
-                     coefficient=self.coefficient,
+                     sense=self._sense,
+                     coefficient=self._coefficient,
                      name=self.name,
                      internal_index=self._index)
 
+    def _update_bounds(self) -> None:
+        """
+        Compute the constraint bounds from the sense and the coefficient
+        """
+        if self._sense == '<=':
+            self._lb, self._ub = -MIP_INF, self._coefficient
+        elif self._sense == '==':
+            self._lb, self._ub = self._coefficient, self._coefficient
+        elif self._sense == '>=':
+            self._lb, self._ub = self._coefficient, MIP_INF
+        else:
+            raise Exception(f"Invalid sense: {self._sense}")
+
     def get_bounds(self) -> Tuple[float, float]:
         """
         Get the constraint bounds
         :return: lhs <= constraint <= rhs
         """
-        MIP_INF = 1e20
-        if self.sense == '==':
-            return self.coefficient, self.coefficient
-        elif self.sense == '<=':
-            return -MIP_INF, self.coefficient
-        elif self.sense == '>=':
-            return self.coefficient, MIP_INF
-        else:
-            raise Exception(f"Invalid sense: {self.sense}")
+        return self._lb, self._ub
 
     def set_index(self, index: int) -> None:
         """
@@ -240,20 +291,23 @@ class LpCst:
         :param var: Variable
         :param coeff: coefficient
         """
-        self.linear_expression += coeff * var
+        if coeff != 0:
+            self.linear_expression.add_term_inplace(var, coeff)
 
     def add_var(self, var: LpVar):
         """
         Add a term to the constraint
         :param var: Variable
         """
-        self.linear_expression += var
+        self.linear_expression.add_term_inplace(var, 1.0)
 
 
 class LpExp:
     """
     Expression
     """
+    __slots__ = ('terms', 'offset')
+
     def __init__(self, variable: LpVar = None, coefficient: float = 1.0, offset: float = 0.0):
         """
 
@@ -267,9 +321,25 @@ class LpExp:
         if variable is not None:
             self.terms[variable] = coefficient
 
+    @classmethod
+    def from_arrays(cls, indices: IntVec, coefficients: Vec, variables: List[LpVar], offset: float = 0.0) -> "LpExp":
+        """
+        Build an expression directly from arrays of terms, without the arithmetic operators
+        :param indices: positions in variables of the terms' variables (without repetitions)
+        :param coefficients: coefficients of the terms
+        :param variables: list of variables indexed by indices
+        :param offset: constant of the expression
+        :return: Expression
+        """
+        e = cls(offset=offset)
+        e.terms = dict(zip(map(variables.__getitem__, indices.tolist()), coefficients.tolist()))
+        return e
+
     def copy(self) -> "LpExp":
         """
-        Make a deep copy of this expression
+        Make a copy of this expression
+        The terms dictionary is copied, but the LpVar objects are shared by reference
+        (variables are meant to be shared among expressions)
         :return: Expression
         """
         e = LpExp()
@@ -281,17 +351,21 @@ class LpExp:
 
     def _comparison(self, sense: str, other: Union["LpExp", LpVar, float, int]) -> LpCst:
 
-        if isinstance(other, (int, float)):
-            return LpCst(linear_expression=self,
+        # in every case the constraint gets its own expression (a single copy of the terms),
+        # since expressions are modified in place (i.e. by +=)
+        t = type(other)
+        if t is float or t is int or isinstance(other, (int, float)):
+            return LpCst(linear_expression=self.copy(),
                          sense=sense,
                          coefficient=other - self.offset)
 
-        elif isinstance(other, LpVar):
-            other = LpExp(variable=other)
-            combined_expression = self - other
-            return LpCst(combined_expression, sense, 0)
+        elif t is LpVar:
+            combined_expression = self.copy().add_term_inplace(other, -1.0)
+            return LpCst(linear_expression=combined_expression,
+                         sense=sense,
+                         coefficient=-combined_expression.offset)
 
-        elif isinstance(other, LpExp):
+        elif t is LpExp:
             combined_expression = self - other
             return LpCst(linear_expression=combined_expression,
                          sense=sense,
@@ -308,82 +382,207 @@ class LpExp:
     def __eq__(self, other: Union["LpExp", LpVar, float, int]) -> LpCst:
         return self._comparison(sense="==", other=other)
 
-    def __add__(self, other: Union[LpVar, "LpExp", int, float]) -> "LpExp":
-        new_expr = self.copy()
+    def compact(self) -> "LpExp":
+        """
+        Remove in place the terms whose coefficient is zero (i.e. after A - A)
+        :return: this expression
+        """
+        zeros = [var for var, coeff in self.terms.items() if coeff == 0]
+        for var in zeros:
+            del self.terms[var]
+        return self
 
-        if isinstance(other, LpVar):
-            other = LpExp(other)
+    def _comparison_batch(self, sense: str, rhs: Vec) -> List[LpCst]:
+        """
+        Build one constraint per right-hand side value
+        :param sense: <=, ==, >=
+        :param rhs: array of right-hand side values
+        :return: list of constraints
+        """
+        # each constraint gets its own copy of the terms, since expressions are modified in place
+        coefficients = (np.asarray(rhs, dtype=float) - self.offset).tolist()
+        return [LpCst(linear_expression=self.copy(), sense=sense, coefficient=c) for c in coefficients]
 
-        if isinstance(other, LpExp):
+    def le_batch(self, rhs: Vec) -> List[LpCst]:
+        """
+        Constraints self <= rhs[i] for every value of rhs
+        :param rhs: array of right-hand side values
+        :return: list of constraints
+        """
+        return self._comparison_batch(sense="<=", rhs=rhs)
 
-            new_expr.offset += other.offset
-            for var, coeff in other.terms.items():
-                if var in new_expr.terms:
-                    new_expr.terms[var] += coeff
-                else:
-                    new_expr.terms[var] = coeff
+    def ge_batch(self, rhs: Vec) -> List[LpCst]:
+        """
+        Constraints self >= rhs[i] for every value of rhs
+        :param rhs: array of right-hand side values
+        :return: list of constraints
+        """
+        return self._comparison_batch(sense=">=", rhs=rhs)
 
-        elif isinstance(other, (int, float)):  # Handling constants in expressions
-            new_expr.offset += other
+    def eq_batch(self, rhs: Vec) -> List[LpCst]:
+        """
+        Constraints self == rhs[i] for every value of rhs
+        :param rhs: array of right-hand side values
+        :return: list of constraints
+        """
+        return self._comparison_batch(sense="==", rhs=rhs)
 
-        else:
-            raise ValueError("Operands must be of type Variable, Expression, int, or float")
+    def __add__(self, other: Union[LpVar, "LpExp", int, float]) -> "LpExp":
+        if type(other) is LpExp:
+            # build the union of the terms in one go (the dict is sized once, and the keys keep
+            # the order of self followed by the new ones of other), then sum the common variables
+            new_expr = LpExp(offset=self.offset + other.offset)
+            terms = {**self.terms, **other.terms}
+            if len(terms) < len(self.terms) + len(other.terms):
+                for var in self.terms.keys() & other.terms.keys():
+                    terms[var] = self.terms[var] + other.terms[var]
+            new_expr.terms = terms
+            return new_expr
 
+        new_expr = self.copy()
+        new_expr += other
         return new_expr
 
     def __radd__(self, other: Union[LpVar, "LpExp", int, float]) -> "LpExp":
         return self.__add__(other)
 
     def __iadd__(self, other: Union[LpVar, "LpExp", int, float]) -> "LpExp":
-        return self.__add__(other)
+        """
+        Add in place (expr += other), without copying the terms
+        :param other: LpVar, LpExp, int or float
+        :return: this expression
+        """
+        # exact type checks first (the common cases), isinstance only for the other numeric types
+        t = type(other)
+        if t is LpVar:
+            self.add_term_inplace(other, 1.0)
 
-    def __mul__(self, other: Union[float, int]) -> "LpExp":
+        elif t is LpExp:
+            self.offset += other.offset
+            terms = self.terms
+            for var, coeff in other.terms.items():
+                current = terms.get(var, None)
+                terms[var] = coeff if current is None else current + coeff
 
-        if isinstance(other, (int, float)):
-            new_expr = LpExp()
-            if other != 0:
-                new_expr.offset = self.offset * other
-                for var, coeff in self.terms.items():
-                    new_expr.terms[var] = coeff * other
-            else:
+        elif t is float or t is int or isinstance(other, (int, float)):  # Handling constants in expressions
+            self.offset += other
+
+        else:
+            raise ValueError("Operands must be of type Variable, Expression, int, or float")
+
+        return self
+
+    def add_term_inplace(self, var: LpVar, coeff: float) -> "LpExp":
+        """
+        Add coeff * var to this expression in place, without creating intermediate expressions
+        :param var: Variable
+        :param coeff: coefficient
+        :return: this expression
+        """
+        current = self.terms.get(var, None)
+        self.terms[var] = coeff if current is None else current + coeff
+        return self
+
+    def __mul__(self, other: Union[float, int, np.ndarray]) -> Union["LpExp", np.ndarray]:
+        """
+        Multiply this expression by a scalar, or by an array of scalars
+        :param other: int, float or array of coefficients (i.e. one per time step)
+        :return: LpExp, or array (with the shape of other) of LpExp
+        """
+        t = type(other)
+        if t is float or t is int or isinstance(other, (int, float)):
+
+            if other == 0:
                 # if we multiply by zero, the expression should remain empty
-                pass
+                return LpExp()
 
+            if other == 1:
+                return self.copy()
+
+            new_expr = LpExp()
+            new_expr.offset = self.offset * other
+            new_expr.terms = {var: coeff * other for var, coeff in self.terms.items()}
             return new_expr
 
+        elif isinstance(other, np.ndarray):
+            # the terms are read once, and every scaled set of coefficients is computed with numpy
+            variables = list(self.terms.keys())
+            coefficients = np.fromiter(self.terms.values(), dtype=float, count=len(variables))
+            res = np.empty(other.shape, dtype=object)
+            for k, factor in enumerate(other.ravel().tolist()):
+                if factor == 0:
+                    new_expr = LpExp()
+                else:
+                    new_expr = LpExp(offset=self.offset * factor)
+                    new_expr.terms = dict(zip(variables, (coefficients * factor).tolist()))
+                res.flat[k] = new_expr
+            return res
+
         else:
             raise ValueError("Can only multiply by a scalar")
 
     def __rmul__(self, other: Union[float, int]) -> "LpExp":
         return self.__mul__(other)
 
-    def __sub__(self, other: Union[LpVar, "LpExp", int, float]) -> "LpExp":
-        if isinstance(other, LpVar):
-            other = LpExp(variable=other)
+    def __imul__(self, other: Union[float, int]) -> "LpExp":
+        """
+        Multiply in place (expr *= other), without copying the terms
+        :param other: int or float
+        :return: this expression
+        """
+        t = type(other)
+        if t is float or t is int or isinstance(other, (int, float)):
 
-        if isinstance(other, LpExp):
-            new_expr = self.copy()
-            new_expr.offset -= other.offset
-            for var, coeff in other.terms.items():
-                if var in new_expr.terms:
-                    new_expr.terms[var] -= coeff
-                else:
-                    new_expr.terms[var] = -coeff
-            return new_expr
+            if other == 0:
+                # if we multiply by zero, the expression should remain empty
+                self.terms.clear()
+                self.offset = 0.0
 
-        elif isinstance(other, (int, float)):
-            new_expr = self.copy()
-            new_expr.offset -= other
-            return new_expr
+            elif other != 1:
+                self.offset *= other
+                terms = self.terms
+                for var in terms:
+                    terms[var] *= other
+
+            return self
 
         else:
-            raise ValueError("Unsupported operand type(s) for -: 'Expression' and '{}'".format(type(other)))
+            raise ValueError("Can only multiply by a scalar")
+
+    def __sub__(self, other: Union[LpVar, "LpExp", int, float]) -> "LpExp":
+        new_expr = self.copy()
+        new_expr -= other
+        return new_expr
 
     def __rsub__(self, other: Union[LpVar, "LpExp", int, float]) -> "LpExp":
-        return (-1 * self).__add__(other)
+        new_expr = -self
+        new_expr += other
+        return new_expr
 
     def __isub__(self, other: Union[LpVar, "LpExp", int, float]) -> "LpExp":
-        return self.__sub__(other)
+        """
+        Subtract in place (expr -= other), without copying the terms
+        :param other: LpVar, LpExp, int or float
+        :return: this expression
+        """
+        t = type(other)
+        if t is LpVar:
+            self.add_term_inplace(other, -1.0)
+
+        elif t is LpExp:
+            self.offset -= other.offset
+            terms = self.terms
+            for var, coeff in other.terms.items():
+                current = terms.get(var, None)
+                terms[var] = -coeff if current is None else current - coeff
+
+        elif t is float or t is int or isinstance(other, (int, float)):
+            self.offset -= other
+
+        else:
+            raise ValueError("Unsupported operand type(s) for -: 'Expression' and '{}'".format(type(other)))
+
+        return self
 
     def __neg__(self) -> "LpExp":
         """
@@ -391,7 +590,6 @@ class LpExp:
         :return: LpExp with negative terms
         """
         e = LpExp()
-        e.offset = self.offset
-        for var, coeff in self.terms.items():
-            e.terms[var] = -coeff
+        e.offset = -self.offset
+        e.terms = {var: -coeff for var, coeff in self.terms.items()}
         return e
@@ -16,6 +16,7 @@
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 import os
 import numpy as np
+import pandas as pd
 from GridCalEngine.api import *
 
 
@@ -123,3 +124,134 @@ def test_linear_contingency():
 #     #res = linear_analysis.results.PTDF - ptdf_result
 #     #print(res)
 #     assert(np.isclose(linear_analysis.results.PTDF, ptdf_result).all())
+
+
+def test_report_add_batch() -> None:
+    """
+    Adding rows by columns must give the same report as adding them one by one
+    :return:
+    """
+    from GridCalEngine.Simulations.ContingencyAnalysis.contingencies_report import ContingencyResultsReport
+
+    names = np.array(['L1', 'L2', 'L3'])
+    rates = np.array([10.0, 20.0, 30.0])
+    flows = np.array([12.5, 25.0, 31.0])
+
+    report1 = ContingencyResultsReport()
+    for i in range(3):
+        report1.add(time_index=0, t_prob=1.0, area_from="", area_to="", base_name=names[i],
+                    contingency_name='Base', base_rating=rates[i], contingency_rating=rates[i],
+                    srap_rating=rates[i], base_flow=flows[i], post_contingency_flow=0.0, post_srap_flow=0.0,
+                    base_loading=flows[i] / rates[i], post_contingency_loading=0.0, post_srap_loading=0.0,
+                    msg_ov='Overload not acceptable', msg_srap='SRAP not applicable', srap_power=0.0,
+                    solved_by_srap=False)
+
+    report2 = ContingencyResultsReport()
+    report2.add_batch(time_index=0, t_prob=1.0, area_from="", area_to="", base_name=names,
+                      contingency_name='Base', base_rating=rates, contingency_rating=rates,
+                      srap_rating=rates, base_flow=flows, post_contingency_flow=0.0, post_srap_flow=0.0,
+                      base_loading=flows / rates, post_contingency_loading=0.0, post_srap_loading=0.0,
+                      msg_ov='Overload not acceptable', msg_srap='SRAP not applicable', srap_power=0.0,
+                      solved_by_srap=False)
+
+    assert report2.size() == 3
+    assert np.array_equal(report1.get_data(time_array=None), report2.get_data(time_array=None))
+
+
+def test_linear_contingency_parallel() -> None:
+    """
+    Splitting the linear contingencies among processes must give the same results as running them in series
+    :return:
+    """
+    from GridCalEngine.Simulations.ContingencyAnalysis.Methods.linear_contingency_analysis import \
+        can_run_in_parallel
+
+    from GridCalEngine.Simulations.ContingencyAnalysis.contingency_plan import generate_automatic_contingency_plan
+
+    main_circuit = MultiCircuit()
+    buses = [Bus(f'Bus {i + 1}', Vnom=20) for i in range(5)]
+    for bus in buses:
+        main_circuit.add_bus(bus)
+    main_circuit.add_generator(buses[0], Generator('Slack Generator', vset=1.0))
+    for i, (p, q) in enumerate([(40, 20), (25, 15), (40, 20), (50, 20)]):
+        main_circuit.add_load(buses[i + 1], Load(f'load {i + 2}', P=p, Q=q))
+
+    # low ratings to get overloads in the report
+    for f, t in [(0, 1), (0, 2), (0, 4), (1, 2), (1, 4), (2, 3), (3, 4)]:
+        main_circuit.add_line(Line(buses[f], buses[t], name=f'line {f + 1}-{t + 1}', x=0.1, rate=40))
+
+    # branch only N-1 plan
+    contingencies, groups = generate_automatic_contingency_plan(main_circuit, k=1, consider_branches=True,
+                                                                branch_types=[DeviceType.LineDevice])
+    for group in groups:
+        main_circuit.add_contingency_group(group)
+    for contingency in contingencies:
+        main_circuit.add_contingency(contingency)
+
+    results = list()
+    for n_processes in [1, 2]:
+        options = ContingencyAnalysisOptions(contingency_method=ContingencyMethod.PTDF,
+                                             use_srap=True,
+                                             n_processes=n_processes)
+        driver = ContingencyAnalysisDriver(grid=main_circuit, options=options)
+        driver.run()
+        assert can_run_in_parallel(options, driver.linear_multiple_contingencies) == (n_processes > 1)
+        results.append(driver.results)
+
+    serial, parallel = results
+    assert serial.report.size() > 0
+    assert np.allclose(serial.Sf, parallel.Sf)
+    assert np.allclose(serial.loading, parallel.loading)
+    assert np.allclose(serial.srap_used_power, parallel.srap_used_power)
+    assert np.array_equal(serial.report.get_data(time_array=None), parallel.report.get_data(time_array=None))
+
+
+def test_report_stream(tmp_path) -> None:
+    """
+    Streaming the report to disk, with a flush in the middle, must write the same rows as get_df
+    :return:
+    """
+    from GridCalEngine.Simulations.ContingencyAnalysis.contingencies_report import ContingencyResultsReport
+
+    names = np.array([f'L{i}' for i in range(10)])
+    rates = np.linspace(10.0, 100.0, 10)
+    flows = rates * 1.25
+
+    def fill(report: ContingencyResultsReport, t: int):
+        report.add_batch(time_index=t, t_prob=0.5, area_from="A1", area_to="A2", base_name=names,
+                         contingency_name=f'Cnt {t}', base_rating=rates, contingency_rating=rates * 1.1,
+                         srap_rating=rates * 1.4, base_flow=flows, post_contingency_flow=flows * 1.5,
+                         post_srap_flow=flows, base_loading=flows / rates, post_contingency_loading=1.875,
+                         post_srap_loading=1.25, msg_ov='Overload not acceptable', msg_srap='SRAP not applicable',
+                         srap_power=t * 0.1, solved_by_srap=bool(t % 2))
+
+    expected = ContingencyResultsReport()
+    for t in range(3):
+        fill(expected, t)
+    df_expected = expected.get_df(time_array=None).reset_index(drop=True)
+
+    formats = ['csv']
+    try:
+        import pyarrow as pa
+        formats.append('arrow')
+    except ImportError:
+        pa = None
+
+    for fmt in formats:
+        fname = str(tmp_path / f'report.{fmt}')
+        report = ContingencyResultsReport()
+        report.open_stream(fname, fmt=fmt)
+        fill(report, 0)
+        report.flush_stream()
+        assert report.size() == 0
+        fill(report, 1)
+        fill(report, 2)
+        report.close_stream()
+        assert report.streamed_size() == expected.size()
+
+        if fmt == 'csv':
+            df = pd.read_csv(fname, dtype=str, keep_default_na=False)
+            assert np.array_equal(df.values, df_expected.values.astype(str))
+        else:
+            df = pa.ipc.open_file(fname).read_all().to_pandas()
+            pd.testing.assert_frame_equal(df, df_expected, check_dtype=False)
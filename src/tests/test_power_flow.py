@@ -235,3 +235,85 @@ def test_voltage_remote_control_with_generation() -> None:
         assert np.isclose(vm[6], grid.generators[4].Vset, atol=options.tolerance)
 
         print(solver_type)
+
+
+def test_fdpf_factorization_reuse():
+    """
+    The fast decoupled factorizations must be reused for the same matrices and block indices only
+    """
+    from scipy.sparse import csc_matrix
+    from GridCalEngine.Simulations.PowerFlow.NumericalMethods.fast_decoupled import FastDecoupledFactorizations
+
+    B = csc_matrix(np.array([[4.0, -1.0, -1.0],
+                             [-1.0, 4.0, -1.0],
+                             [-1.0, -1.0, 4.0]]))
+    blck1 = np.array([1, 2])
+    blck2 = np.array([2])
+
+    factorizations = FastDecoupledFactorizations()
+    f1, f2 = factorizations.get(B, B, blck1, blck2, blck2)
+    g1, g2 = factorizations.get(B, B, blck1.copy(), blck2.copy(), blck2.copy())
+    assert f1 is g1 and f2 is g2
+
+    h1, h2 = factorizations.get(B, B, np.array([0, 1]), blck2, blck2)
+    assert h1 is not f1
+    assert np.allclose(h1.solve(np.array([1.0, 2.0])), np.linalg.solve(B.toarray()[:2, :2], [1.0, 2.0]))
+
+    # an equal copy reuses the factorizations, a matrix modified in place does not
+    k1, k2 = factorizations.get(B.copy(), B, np.array([0, 1]), blck2, blck2)
+    assert k1 is h1
+
+    B.data[0] = 5.0
+    m1, m2 = factorizations.get(B, B, np.array([0, 1]), blck2, blck2)
+    assert m1 is not h1
+    assert np.allclose(m1.solve(np.array([1.0, 2.0])), np.linalg.solve(B.toarray()[:2, :2], [1.0, 2.0]))
+
+
+def test_lu_solver():
+    """
+    The compiled triangular solve must match SuperLU's own solve
+    """
+    import scipy.sparse as sp
+    from scipy.sparse.linalg import splu
+    from GridCalEngine.Simulations.PowerFlow.NumericalMethods.fast_decoupled import LUSolver
+
+    n = 40
+    A = (sp.random(n, n, density=0.1, random_state=1) + sp.eye(n) * 3.0).tocsc()
+    b = np.random.default_rng(1).normal(size=n)
+    factorization = splu(A)
+
+    assert np.allclose(LUSolver(factorization).solve(b), factorization.solve(b), atol=1e-12)
+
+
+def test_fdpf_factorizations_held_by_the_caller():
+    """
+    The fast decoupled factorizations passed to the power flow must be reused by the following runs
+    and give the same solution as factorizing in every run
+    """
+    from GridCalEngine.Simulations.PowerFlow.power_flow_worker import multi_island_pf_nc
+
+    grid = gce.MultiCircuit()
+    buses = [gce.Bus(f'Bus {i + 1}', Vnom=20) for i in range(5)]
+    for bus in buses:
+        grid.add_bus(bus)
+    grid.add_generator(buses[0], gce.Generator('Slack Generator', vset=1.0))
+    for i, (p, q) in enumerate([(40, 20), (25, 15), (40, 20), (50, 20)]):
+        grid.add_load(buses[i + 1], gce.Load(f'load {i + 2}', P=p, Q=q))
+    for f, t in [(0, 1), (0, 2), (0, 4), (1, 2), (1, 4), (2, 3), (3, 4)]:
+        grid.add_line(gce.Line(buses[f], buses[t], name=f'line {f + 1}-{t + 1}', r=0.05, x=0.11, b=0.02))
+
+    options = PowerFlowOptions(SolverType.FASTDECOUPLED, retry_with_other_methods=False)
+    nc = compile_numerical_circuit_at(grid)
+
+    fdpf_factorizations = dict()
+    res1 = multi_island_pf_nc(nc=nc, options=options, fdpf_factorizations=fdpf_factorizations)
+    B1_factorization = fdpf_factorizations[0].B1_factorization
+
+    res2 = multi_island_pf_nc(nc=compile_numerical_circuit_at(grid), options=options,
+                              fdpf_factorizations=fdpf_factorizations)
+    assert fdpf_factorizations[0].B1_factorization is B1_factorization
+
+    res3 = multi_island_pf_nc(nc=nc, options=options)
+    assert res1.converged
+    assert np.allclose(res1.voltage, res2.voltage)
+    assert np.allclose(res1.voltage, res3.voltage)
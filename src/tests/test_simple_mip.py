@@ -16,6 +16,7 @@
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
 import numpy as np
+import pytest
 from GridCalEngine.Utils.MIP.SimpleMip import LpModel, LpExp, LpCst, LpVar
 
 
@@ -160,3 +161,305 @@ def test_lp_simple4():
     assert np.isclose(prob.get_objective_value(), 208.13008130081298)
     assert np.allclose(prob.get_array_value(X), np.array([27.642277, 58.536587, 26.016260, 104.065041]))
     assert np.allclose(prob.get_array_value(S), np.array([72.357727, 0.0, 0.0, 0.0, 0.0]))
+
+
+def test_coefficients_data():
+    """
+    The constraints matrix and bounds must be built with the variables indices as columns
+    """
+    prob = LpModel()
+
+    X = prob.add_vars(name="X", size=3)
+
+    prob.minimize(X[0] + X[1] + X[2])
+
+    prob.add_cst(2 * X[2] + X[0] <= 10)
+    prob.add_cst(X[1] - 3 * X[2] >= -1)
+    prob.add_cst(X[0] + X[1] == 4)
+
+    lower, A, upper = prob.get_coefficients_data()
+
+    assert np.allclose(A.toarray(), np.array([[1, 0, 2],
+                                              [0, 1, -3],
+                                              [1, 1, 0]]))
+    assert np.allclose(lower, [-1e20, -1, 4])
+    assert np.allclose(upper, [10, 1e20, 4])
+
+
+def test_coefficients_data_foreign_variable():
+    """
+    Variables that were not added to the model must be rejected instead of being written in another column
+    """
+    for foreign in [LpVar(name="Y"), LpModel().add_vars(name="Z", size=5)[4]]:
+        prob = LpModel()
+        X = prob.add_vars(name="X", size=3)
+        prob.add_cst(X[0] + X[1] <= 10)
+        prob.add_cst(X[2] + foreign >= 1)
+
+        with pytest.raises(Exception):
+            prob.get_coefficients_data()
+
+
+def test_terms_are_combined():
+    """
+    Copies of a variable must be merged in the same term, and different variables must not
+    """
+    prob = LpModel()
+
+    A = prob.add_var(name="A")
+    B = prob.add_var(name="B")
+
+    # copies of a variable are the same key of the expression terms
+    e = A + 2 * A.copy() + B - B.copy() + 3 * A
+    assert len(e.terms) == 2
+    assert e.terms[A] == 6
+    assert e.terms[B] == 0
+
+    # different variables with the same name are not
+    C = prob.add_var(name="A")
+    e2 = A + C
+    assert len(e2.terms) == 2
+
+
+def test_inplace_accumulation():
+    """
+    The in-place addition must modify the expression itself and not the constraints built from it
+    """
+    prob = LpModel()
+
+    A = prob.add_var(name="A")
+    B = prob.add_var(name="B")
+
+    e = A + B
+    e_id = id(e)
+    c = e <= 4
+
+    e += 2 * B
+    e += A
+    e += 3
+
+    assert id(e) == e_id
+    assert e.terms[A] == 2
+    assert e.terms[B] == 3
+    assert e.offset == 3
+
+    # the constraint built before is not modified
+    assert c.terms[A] == 1
+    assert c.terms[B] == 1
+
+    c.add_term(A, 5)
+    assert c.terms[A] == 6
+    assert e.terms[A] == 2
+
+
+def test_sum_and_objective_copy_the_expression():
+    """
+    The in-place operators must not modify the expressions given to sum and to the objective
+    """
+    prob = LpModel()
+
+    A = prob.add_var(name="A")
+    B = prob.add_var(name="B")
+
+    e = A + 2 * B
+
+    s = prob.sum(e)
+    s += A
+    s *= 3
+    assert s is not e
+    assert e.terms[A] == 1
+    assert e.terms[B] == 2
+
+    prob.minimize(e)
+    e += B
+    e -= 5
+    assert prob.objective.terms[A] == 1
+    assert prob.objective.terms[B] == 2
+    assert prob.objective.offset == 0
+
+
+def test_inplace_sub_mul_and_neg():
+    """
+    The in-place subtraction and multiplication must modify the expression itself
+    """
+    prob = LpModel()
+
+    A = prob.add_var(name="A")
+    B = prob.add_var(name="B")
+
+    e = 2 * A + B + 4
+    e_id = id(e)
+
+    e -= A
+    e -= 3 * B - 1
+    e *= 2
+
+    assert id(e) == e_id
+    assert e.terms[A] == 2
+    assert e.terms[B] == -4
+    assert e.offset == 10
+
+    n = -e
+    assert n.terms[A] == -2
+    assert n.terms[B] == 4
+    assert n.offset == -10
+
+    r = 1 - e
+    assert r.terms[A] == -2
+    assert r.offset == -9
+
+
+def test_comparison_offsets():
+    """
+    The expression offsets must be moved to the right hand side of the constraints
+    """
+    prob = LpModel()
+
+    A = prob.add_var(name="A")
+    B = prob.add_var(name="B")
+
+    prob.add_cst(A <= 5)
+    prob.add_cst(A + 3 >= B)
+    prob.add_cst(A == B - 2)
+    prob.add_cst(2 * A + 1 <= 7)
+
+    lower, M, upper = prob.get_coefficients_data()
+
+    assert np.allclose(M.toarray(), np.array([[1, 0],
+                                              [1, -1],
+                                              [1, -1],
+                                              [2, 0]]))
+    assert np.allclose(lower, [-1e20, -3, -2, -1e20])
+    assert np.allclose(upper, [5, 1e20, -2, 6])
+
+
+def test_matrix_constraints():
+    """
+    The constraints added from a sparse matrix must have its rows as terms
+    """
+    from scipy.sparse import csc_matrix
+
+    prob = LpModel()
+
+    X = prob.add_vars(name="X", size=3)
+
+    A = csc_matrix(np.array([[1.0, 0.0, 2.0],
+                             [0.0, 1.0, -3.0]]))
+    csts = prob.add_matrix_csts(A, X, "<=", np.array([10.0, 5.0]), name="mat")
+    prob.add_cst(X[0] + X[1] >= 1)
+
+    assert len(csts) == 2
+    assert csts[0].terms[X[0]] == 1
+    assert csts[0].terms[X[2]] == 2
+    assert X[1] not in csts[0].terms
+
+    lower, M, upper = prob.get_coefficients_data()
+    assert np.allclose(M.toarray(), np.array([[1, 0, 2],
+                                              [0, 1, -3],
+                                              [1, 1, 0]]))
+    assert np.allclose(lower, [-1e20, -1e20, 1])
+    assert np.allclose(upper, [10, 5, 1e20])
+
+
+def test_array_multiplication():
+    """
+    Multiplying by an array must give one expression per array element
+    """
+    prob = LpModel()
+
+    A = prob.add_var(name="A")
+    B = prob.add_var(name="B")
+
+    factors = np.array([1.0, 2.0, 0.0])
+    res = (2 * A - B + 1) * factors
+
+    assert res.shape == (3,)
+    assert res[1].terms[A] == 4
+    assert res[1].terms[B] == -2
+    assert res[1].offset == 2
+    assert len(res[2].terms) == 0
+
+    res2 = A * factors
+    assert res2[0].terms[A] == 1
+    assert res2[1].terms[A] == 2
+
+
+def test_constraint_bounds():
+    """
+    The constraint bounds must follow the changes of its sense and coefficient
+    """
+    prob = LpModel()
+
+    A = prob.add_var(name="A")
+
+    cst = A + 1 <= 5
+    assert cst.get_bounds() == (-1e20, 4)
+
+    cst.coefficient = 2
+    assert cst.get_bounds() == (-1e20, 2)
+
+    cst.sense = '>='
+    assert cst.get_bounds() == (2, 1e20)
+
+    cst.sense = '=='
+    assert cst.get_bounds() == (2, 2)
+
+
+def test_invalid_sense():
+    """
+    Unknown constraint senses must be rejected
+    """
+    prob = LpModel()
+
+    A = prob.add_var(name="A")
+
+    with pytest.raises(Exception):
+        LpCst(LpExp(A), "<", 1.0)
+
+
+def test_comparison_batch():
+    """
+    The batched comparisons must give one independent constraint per value
+    """
+    prob = LpModel()
+
+    A = prob.add_var(name="A")
+    B = prob.add_var(name="B")
+
+    e = A + 2 * B + 1
+    csts = e.le_batch(np.array([3.0, 5.0]))
+
+    assert len(csts) == 2
+    assert [c.coefficient for c in csts] == [2.0, 4.0]
+    assert all(c.sense == "<=" for c in csts)
+    assert csts[1].terms[B] == 2
+
+    # every constraint owns its expression
+    csts[0].add_var(A)
+    assert csts[0].terms[A] == 2
+    assert csts[1].terms[A] == 1
+    assert e.terms[A] == 1
+
+    assert [c.get_bounds() for c in e.ge_batch(np.array([1.0]))] == [(0.0, 1e20)]
+    assert [c.get_bounds() for c in e.eq_batch(np.array([1.0]))] == [(0.0, 0.0)]
+
+
+def test_compact():
+    """
+    Compacting must remove the terms that cancelled out
+    """
+    prob = LpModel()
+
+    A = prob.add_var(name="A")
+    B = prob.add_var(name="B")
+
+    e = 2 * A + B - 2 * A
+    assert A in e.terms
+
+    e.compact()
+    assert A not in e.terms
+    assert e.terms[B] == 1
+
+    prob.add_cst(A + B - B <= 1)
+    lower, M, upper = prob.get_coefficients_data()
+    assert M.nnz == 1
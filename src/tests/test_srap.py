@@ -1,6 +1,8 @@
 from GridCalEngine.api import FileOpen
 from GridCalEngine.Simulations.ContingencyAnalysis.contingency_analysis_driver import (ContingencyAnalysisOptions,
                                                                                        ContingencyAnalysisDriver)
+from GridCalEngine.Simulations.ContingencyAnalysis.Methods.srap import BusesForSrap, is_solvable_batch
+from GridCalEngine.Utils.Sparse.csc_numba import get_sparse_array_numba
 from GridCalEngine.enumerations import EngineType, ContingencyMethod
 import numpy as np
 import os
@@ -160,3 +162,75 @@ def test_srap():
 
     return test_summary
 
+
+def test_srap_batch():
+    """
+    Check that the vectorized SRAP evaluation matches the branch by branch evaluation
+    """
+    rng = np.random.default_rng(42)
+    nbr, nbus, n = 10, 30, 6
+
+    for _ in range(50):
+        # rounded values to have plenty of ties in the sensitivities
+        sensitivities = np.round(rng.normal(size=(n, nbus)), 1) * (rng.random((n, nbus)) > 0.3)
+        available_power = np.round(rng.random(nbus) * 10 * (rng.random(nbus) > 0.3), 1)
+        c_flows = rng.normal(size=n) * 50
+        ratings = rng.random(n) * 30
+        br_idx = rng.choice(nbr, n, replace=False)
+        srap_pmax_mw = rng.random() * 40
+        top_n = int(rng.integers(1, 40))
+
+        srap_used_power = np.zeros((nbr, nbus))
+        expected = list()
+        for i in range(n):
+            sens, bus_idx = get_sparse_array_numba(sensitivities[i, :], threshold=1e-3)
+            buses_for_srap = BusesForSrap(branch_idx=br_idx[i], bus_indices=bus_idx, sensitivities=sens)
+            expected.append(buses_for_srap.is_solvable(c_flow=c_flows[i],
+                                                       rating=ratings[i],
+                                                       srap_pmax_mw=srap_pmax_mw,
+                                                       available_power=available_power,
+                                                       srap_used_power=srap_used_power,
+                                                       branch_idx=br_idx[i],
+                                                       top_n=top_n))
+
+        srap_used_power_batch = np.zeros((nbr, nbus))
+        solved, max_srap_power = is_solvable_batch(c_flows=c_flows,
+                                                   ratings=ratings,
+                                                   sensitivities=np.where(np.abs(sensitivities) > 1e-3,
+                                                                          sensitivities, 0.0),
+                                                   srap_pmax_mw=srap_pmax_mw,
+                                                   available_power=available_power,
+                                                   srap_used_power=srap_used_power_batch,
+                                                   branch_indices=br_idx,
+                                                   top_n=top_n)
+
+        assert solved.tolist() == [s for s, _ in expected]
+        assert np.allclose(max_srap_power, [p for _, p in expected])
+        assert np.allclose(srap_used_power_batch, srap_used_power)
+
+
+def test_ptdf_comp():
+    """
+    The compensated PTDF must match the dense formula and leave the PTDF untouched
+    """
+    from scipy.sparse import csc_matrix
+    from GridCalEngine.Simulations.ContingencyAnalysis.contingencies_report import get_ptdf_comp
+
+    np.random.seed(1)
+    n_br, n_bus = 20, 12
+    PTDF = np.random.rand(n_br, n_bus) - 0.5
+    PTDF_original = PTDF.copy()
+    branch_indices = np.array([3, 7, 11])
+    mlodf = np.random.rand(n_br, len(branch_indices))
+    mlodf[mlodf < 0.5] = 0.0
+    mlodf_factors = csc_matrix(mlodf)
+
+    for m in range(n_br):
+        res = get_ptdf_comp(mon_br_idx=m,
+                            branch_indices=branch_indices,
+                            mlodf_factors=mlodf_factors,
+                            PTDF=PTDF)
+        expected = mlodf[m, :] @ PTDF_original[branch_indices, :] + PTDF_original[m, :]
+        assert np.allclose(res, expected)
+
+    assert np.array_equal(PTDF, PTDF_original)